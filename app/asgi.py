@@ -5,3 +5,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_asgi_application()
+
+# gera/carrega o schema OpenAPI antes da primeira requisição
+from app.schema import warm_on_startup  # noqa: E402
+
+warm_on_startup()
@@ -0,0 +1,91 @@
+from rest_framework.exceptions import ValidationError
+
+
+def _split(raw):
+    return [name for name in (x.strip() for x in (raw or '').split(',')) if name]
+
+
+class SparseFieldsetSerializerMixin:
+    # Remove do serializer os campos fora de context['fieldset'] (quando definido).
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fieldset = self.context.get('fieldset')
+        if fieldset is not None:
+            for name in set(self.fields) - set(fieldset):
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """
+    Suporta ?fields=a,b e ?exclude=c nas ações de leitura.
+
+    Os campos escolhidos reduzem a saída do serializer e também o SQL: só as
+    colunas necessárias entram no only() e os joins/prefetches de campos não
+    pedidos são pulados. Sem ?fields=, o only() segue os campos do serializer da
+    ação. Nomes inválidos geram 400 antes de qualquer consulta.
+    """
+    fieldset_actions = ('list', 'retrieve')
+    # campo do serializer -> colunas (caminhos ORM) necessárias para gerá-lo
+    fieldset_columns = {}
+    # colunas sempre carregadas (ex.: usadas por permissões de objeto)
+    fieldset_base_columns = ()
+    # campo do serializer -> relações para select_related / prefetch_related
+    fieldset_select_related = {}
+    fieldset_prefetch_related = {}
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.get_fieldset()
+
+    def get_fieldset(self):
+        if hasattr(self, '_fieldset'):
+            return self._fieldset
+        self._fieldset = None
+        if getattr(self, 'action', None) not in self.fieldset_actions:
+            return None
+
+        params = self.request.query_params
+        fields, exclude = _split(params.get('fields')), _split(params.get('exclude'))
+        if not fields and not exclude:
+            return None
+
+        available = list(self.get_serializer_class().Meta.fields)
+        unknown = sorted(set(fields + exclude) - set(available))
+        if unknown:
+            raise ValidationError({
+                'fields': f'Campos inválidos: {", ".join(unknown)}. Disponíveis: {", ".join(available)}.'
+            })
+        selected = [f for f in available if (not fields or f in fields) and f not in exclude]
+        if not selected:
+            raise ValidationError({'fields': 'Nenhum campo selecionado.'})
+
+        self._fieldset = selected
+        return selected
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            context['fieldset'] = fieldset
+        return context
+
+    def narrow_queryset(self, qs):
+        fieldset = self.get_fieldset()
+        # sem ?fields=, as relações seguem os campos do serializer da ação
+        fields = fieldset if fieldset is not None else self.get_serializer_class().Meta.fields
+        select = {self.fieldset_select_related[f] for f in fields if f in self.fieldset_select_related}
+        prefetch = [self.fieldset_prefetch_related[f] for f in fields if f in self.fieldset_prefetch_related]
+
+        if select:
+            qs = qs.select_related(*sorted(select))
+        if prefetch:
+            qs = qs.prefetch_related(*prefetch)
+
+        # campo sem mapeamento em fieldset_columns: carrega todas as colunas
+        narrow = getattr(self, 'action', None) in self.fieldset_actions
+        if narrow and all(f in self.fieldset_columns for f in fields):
+            columns = set(self.fieldset_base_columns)
+            for f in fields:
+                columns.update(self.fieldset_columns[f])
+            qs = qs.only('pk', *sorted(columns))
+        return qs
@@ -0,0 +1,135 @@
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import connection
+
+# Atributos padrão do LogRecord; o resto (passado via extra=) vai para o JSON.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz= timezone.utc).isoformat(timespec= 'milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        # via QueueStreamHandler o traceback já chega formatado em exc_text
+        exc = self.formatException(record.exc_info) if record.exc_info else record.exc_text
+        if exc:
+            payload['exc_info'] = exc
+        if record.stack_info:
+            payload['stack_info'] = record.stack_info
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        return json.dumps(payload, ensure_ascii= False, default= str)
+
+
+class QueueStreamHandler(logging.handlers.QueueHandler):
+    """
+    Handler não bloqueante: quem loga só enfileira o registro (mensagem e
+    traceback já formatados, este à parte, no campo exc_info); uma thread (QueueListener) serializa em JSON e
+    escreve no stream. Com a fila cheia o registro é descartado (e contado)
+    em vez de segurar a requisição.
+    close() — chamado por logging.shutdown() na saída — esvazia a fila antes.
+    """
+
+    def __init__(self, stream= None, maxsize= 10000):
+        super().__init__(queue.Queue(maxsize))
+        target = logging.StreamHandler(stream or sys.stderr)
+        target.setFormatter(JsonFormatter())
+        self.dropped = 0
+        self.listener = logging.handlers.QueueListener(self.queue, target, respect_handler_level= False)
+        self.listener.start()
+
+    def prepare(self, record):
+        # O QueueHandler padrão embute o traceback em `message`; aqui ele segue
+        # em exc_text (já formatado: a exceção e seus frames não cruzam a fila)
+        # e o JsonFormatter o grava no campo exc_info.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class AccessLogMiddleware:
+    """
+    Uma linha por requisição no logger "app.access": rota, status, duração e
+    número de consultas SQL. Erros (status >= 400) e requisições lentas
+    (ACCESS_LOG_SLOW_MS) são sempre registrados; as demais seguem a amostragem
+    de ACCESS_LOG_HOT_ROUTES (por view) ou ACCESS_LOG_SAMPLE_RATE.
+    """
+    logger = logging.getLogger('app.access')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.ACCESS_LOG_SAMPLE_RATE
+        self.hot_routes = settings.ACCESS_LOG_HOT_ROUTES
+        self.slow_ms = settings.ACCESS_LOG_SLOW_MS
+
+    def __call__(self, request):
+        counter = _QueryCounter()
+        started = time.monotonic()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        duration_ms = (time.monotonic() - started) * 1000
+
+        match = request.resolver_match
+        route = match.view_name if match else None
+        status = response.status_code
+        slow = duration_ms >= self.slow_ms
+        if status < 400 and not slow:
+            rate = self.hot_routes.get(route, self.sample_rate)
+            if random.random() >= rate:
+                return response
+        else:
+            rate = 1.0
+
+        level = logging.ERROR if status >= 500 else logging.WARNING if (status >= 400 or slow) else logging.INFO
+        user = getattr(request, 'user', None)
+        self.logger.log(level, '%s %s %s', request.method, request.path, status, extra= {
+            'method': request.method,
+            'route': route,
+            'path': request.path,
+            'status': status,
+            'duration_ms': round(duration_ms, 2),
+            'queries': counter.count,
+            'user_id': user.pk if user is not None and user.is_authenticated else None,
+            'slow': slow,
+            'sample_rate': rate,
+        })
+        return response
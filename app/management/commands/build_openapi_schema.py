@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app import schema
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera o schema OpenAPI em OPENAPI_SCHEMA_CACHE_DIR para a versão atual do código '
+        '(passo de build/deploy). Não faz nada se o arquivo dessa versão já existir.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regera mesmo que o arquivo da versão atual exista.')
+
+    def handle(self, *args, **opts):
+        started = time.monotonic()
+        generated = schema.build(force= opts['force'])
+        elapsed = time.monotonic() - started
+
+        loaded = schema.get_schema()
+        status = 'gerado' if generated else 'já atualizado'
+        self.stdout.write(f'versão {loaded["version"]} ({status}) em {settings.OPENAPI_SCHEMA_CACHE_DIR}')
+        for fmt, document in loaded['documents'].items():
+            sizes = ', '.join(f'{enc} {len(body)} B' for enc, body in document['variants'].items())
+            self.stdout.write(f'  {fmt}: {sizes}; ETag {document["etag"]}')
+        self.stdout.write(self.style.SUCCESS(f'Concluído em {elapsed:.2f}s.'))
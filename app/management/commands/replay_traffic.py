@@ -0,0 +1,147 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from app.throttling import INTERNAL_REQUEST
+from app.traffic import load_records, replay, summarize, synthesize_body
+
+READ_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Reexecuta um arquivo JSONL gravado pelo TrafficRecorderMiddleware, em processo '
+        'ou via HTTP, e reporta latência (p50/p95/p99) e taxa de erro por rota.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo JSONL com as requisições gravadas.')
+        parser.add_argument('--base-url', help='Envia via HTTP (ex.: http://127.0.0.1:8000). Sem isso, roda em processo.')
+        parser.add_argument('--concurrency', type=int, default=4, help='Requisições simultâneas. Padrão: 4.')
+        parser.add_argument('--speed', type=float, default=0.0,
+                            help='Fator sobre os intervalos gravados (1 = tempo real, 2 = 2x). 0 = sem pausas.')
+        parser.add_argument('--include-writes', action='store_true',
+                            help='Também reexecuta POST/PUT/PATCH/DELETE (corpo sintetizado a partir do formato gravado).')
+        parser.add_argument('--as-user', help='Usuário usado nas requisições gravadas com papel "user".')
+        parser.add_argument('--as-staff', help='Usuário usado nas requisições gravadas com papel "staff".')
+
+    def handle(self, *args, **opts):
+        if opts['concurrency'] <= 0 or opts['speed'] < 0:
+            raise CommandError('--concurrency deve ser > 0 e --speed >= 0.')
+        try:
+            records = load_records(opts['path'], None if opts['include_writes'] else READ_METHODS)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Não foi possível ler {opts["path"]}: {exc}')
+
+        tokens = self._tokens(opts)
+        # papéis sem credencial configurada não são reexecutados
+        runnable, skipped = [], 0
+        for record in records:
+            role = record.get('role', 'anon')
+            if role == 'anon' or role in tokens:
+                runnable.append(record)
+            else:
+                skipped += 1
+        records = runnable
+        if not records:
+            self.stdout.write('Nenhuma requisição para reexecutar.')
+            return
+
+        send = self._http_sender(opts['base_url'], tokens) if opts['base_url'] else self._local_sender(tokens)
+        started = time.monotonic()
+        results = replay(records, send, concurrency= opts['concurrency'], speed= opts['speed'])
+        elapsed = time.monotonic() - started
+
+        self._report(summarize(results), len(results), skipped, elapsed)
+        throttled = sum(1 for _, status, _ in results if status == 429)
+        if throttled and opts['base_url']:
+            self.stderr.write(self.style.WARNING(
+                f'{throttled} resposta(s) 429: o servidor aplicou throttling e as latências incluem as rejeições. '
+                'Aumente DEFAULT_THROTTLE_RATES no servidor alvo ou reduza --concurrency/--speed.'
+            ))
+
+    def _tokens(self, opts):
+        User = get_user_model()
+        tokens = {}
+        for role, username in (('user', opts['as_user']), ('staff', opts['as_staff'])):
+            if not username:
+                continue
+            try:
+                user = User.objects.get(username= username)
+            except User.DoesNotExist:
+                raise CommandError(f'Usuário "{username}" não encontrado.')
+            tokens[role] = str(RefreshToken.for_user(user).access_token)
+        return tokens
+
+    @staticmethod
+    def _request_parts(record, tokens):
+        query = urlencode(record.get('query') or {}, doseq= True)
+        url = record['path'] + (f'?{query}' if query else '')
+        body = None
+        if record.get('body_shape') is not None:
+            body = json.dumps(synthesize_body(record['body_shape']))
+        token = tokens.get(record.get('role'))
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        return url, body, headers
+
+    def _local_sender(self, tokens):
+        host = next((h for h in settings.ALLOWED_HOSTS if h not in ('*', '') and not h.startswith('.')), 'localhost')
+        local = threading.local()
+
+        def send(record):
+            # um Client por thread (cada um com sua conexão de banco)
+            if not hasattr(local, 'client'):
+                # tudo sai de 127.0.0.1: sem a marca interna o throttling de anônimos
+                # (60/min) responderia 429 e o relatório mediria só as rejeições
+                local.client = Client(raise_request_exception= False, HTTP_HOST= host, **{INTERNAL_REQUEST: True})
+            url, body, headers = self._request_parts(record, tokens)
+            extra = {f'HTTP_{k.upper()}': v for k, v in headers.items()}
+            response = local.client.generic(
+                record['method'], url, data= body or '', content_type= 'application/json', **extra,
+            )
+            return response.status_code
+
+        return send
+
+    def _http_sender(self, base_url, tokens):
+        base_url = base_url.rstrip('/')
+
+        def send(record):
+            url, body, headers = self._request_parts(record, tokens)
+            headers.setdefault('Accept', 'application/json')
+            data = None
+            if body is not None:
+                data = body.encode()
+                headers['Content-Type'] = 'application/json'
+            request = urllib.request.Request(base_url + url, data= data, headers= headers, method= record['method'])
+            try:
+                with urllib.request.urlopen(request, timeout= 30) as response:
+                    response.read()
+                    return response.status
+            except urllib.error.HTTPError as exc:
+                return exc.code
+
+        return send
+
+    def _report(self, rows, total, skipped, elapsed):
+        self.stdout.write(f'{"rota":<50} {"n":>6} {"p50":>9} {"p95":>9} {"p99":>9} {"max":>9} {"erros":>7} {"4xx":>7}')
+        for row in rows:
+            self.stdout.write(
+                f'{row["route"][:50]:<50} {row["count"]:>6} '
+                f'{row["p50"]:>7.1f}ms {row["p95"]:>7.1f}ms {row["p99"]:>7.1f}ms {row["max"]:>7.1f}ms '
+                f'{row["error_rate"]:>6.1%} {row["client_error_rate"]:>6.1%}'
+            )
+        rate = total / elapsed if elapsed else 0.0
+        summary = f'{total} requisição(ões) em {elapsed:.2f}s ({rate:.1f} req/s)'
+        if skipped:
+            summary += f'; {skipped} ignorada(s) por falta de credencial (--as-user/--as-staff)'
+        self.stdout.write(self.style.SUCCESS(summary + '.'))
@@ -0,0 +1,348 @@
+import gzip
+import hashlib
+import io
+import logging
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from urllib.parse import unquote_to_bytes, urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.http import HttpResponse
+from django.urls import resolve
+from django.utils.cache import patch_response_headers, patch_vary_headers
+
+from app.throttling import INTERNAL_REQUEST
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só guardamos gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Abaixo disso a compressão não compensa o custo de descompressão no cliente.
+MIN_COMPRESS_LENGTH = 512
+# Ordem de preferência do servidor quando o cliente aceita mais de uma.
+ENCODINGS = ('br', 'gzip')
+
+# Single-flight: numa falta, só quem pega o lock recalcula; os demais servem a
+# entrada vencida (stale-while-revalidate) ou esperam até WAIT_TIMEOUT por ela.
+STALE_TTL = 60
+LOCK_TIMEOUT = 10
+WAIT_TIMEOUT = 2.0
+WAIT_STEP = 0.05
+
+# Frequência das combinações pedidas (para o warm-up): contadas em memória e
+# consolidadas no cache a cada FLUSH_EVERY registros ou FLUSH_INTERVAL segundos.
+FLUSH_EVERY = 50
+FLUSH_INTERVAL = 30
+MAX_TRACKED = 500
+
+_lock = threading.Lock()
+_pending_hits = {}
+_last_flush = {}
+_warm_timers = {}
+
+
+def _cache_key(key_prefix, request):
+    # Accept entra na chave porque o DRF negocia o renderer por ele (Vary: Accept);
+    # o host, porque os links de paginação são absolutos
+    raw = f"{request.get_host()}|{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}"
+    return f'respcache:{key_prefix}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def _generation_key(key_prefix):
+    return f'respcache:gen:{key_prefix}'
+
+
+def _freq_key(key_prefix):
+    return f'respcache:freq:{key_prefix}'
+
+
+def parse_accept_encoding(header):
+    prefs = {}
+    for part in (header or '').split(','):
+        token, _, params = part.partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        prefs[token] = q
+    return prefs
+
+
+def choose_encoding(header, available):
+    prefs = parse_accept_encoding(header)
+    best, best_q = 'identity', 0.0
+    for encoding in ENCODINGS:
+        if encoding not in available:
+            continue
+        q = prefs.get(encoding, prefs.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress_variants(body):
+    variants = {'identity': body}
+    if len(body) < MIN_COMPRESS_LENGTH:
+        return variants
+    # a compressão roda na requisição que preenche o cache (com o lock do
+    # single-flight): níveis moderados, ver RESPONSE_CACHE_GZIP_LEVEL/BROTLI_QUALITY
+    compressed = {'gzip': gzip.compress(body, compresslevel= settings.RESPONSE_CACHE_GZIP_LEVEL, mtime= 0)}
+    if brotli is not None:
+        compressed['br'] = brotli.compress(body, quality= settings.RESPONSE_CACHE_BROTLI_QUALITY)
+    variants.update({k: v for k, v in compressed.items() if len(v) < len(body)})
+    return variants
+
+
+def make_entry(response, timeout, generation):
+    return {
+        'status': response.status_code,
+        'content_type': response['Content-Type'],
+        'variants': compress_variants(response.content),
+        'expires': time.time() + timeout,
+        'generation': generation,
+    }
+
+
+def apply_entry(response, entry, request):
+    # Escreve na resposta a variante negociada pelo Accept-Encoding, já comprimida.
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'), entry['variants'])
+    body = entry['variants'][encoding]
+    response.content = body
+    response['Content-Type'] = entry['content_type']
+    response['Content-Length'] = str(len(body))
+    if encoding == 'identity':
+        if response.has_header('Content-Encoding'):
+            del response['Content-Encoding']
+    else:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ['Accept-Encoding'])
+    patch_response_headers(response, max(0, int(entry['expires'] - time.time())))
+    return response
+
+
+def _cacheable(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and response.get('Content-Type', '').startswith('application/json')
+    )
+
+
+def current_generation(key_prefix):
+    return cache.get(_generation_key(key_prefix), 0)
+
+
+def invalidate(key_prefix):
+    # Marca todas as entradas do prefixo como vencidas (sem apagá-las: continuam
+    # servindo como stale enquanto uma requisição recalcula).
+    key = _generation_key(key_prefix)
+    cache.add(key, 0, timeout= None)
+    try:
+        cache.incr(key)
+    except ValueError:  # chave expulsa do cache entre o add e o incr
+        cache.set(key, 1, timeout= None)
+
+
+def _is_fresh(entry, generation):
+    return entry['generation'] == generation and entry['expires'] > time.time()
+
+
+def _wait_for_entry(key, generation):
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_STEP)
+        entry = cache.get(key)
+        if entry is not None and entry['generation'] == generation:
+            return entry
+    return None
+
+
+def _record_hit(key_prefix, request):
+    secure = '1' if request.is_secure() else '0'
+    signature = '|'.join([secure, request.get_host(), request.get_full_path(), request.META.get('HTTP_ACCEPT', '')])
+    with _lock:
+        pending = _pending_hits.setdefault(key_prefix, Counter())
+        pending[signature] += 1
+        now = time.monotonic()
+        due = (
+            sum(pending.values()) >= FLUSH_EVERY
+            or now - _last_flush.get(key_prefix, 0) >= FLUSH_INTERVAL
+        )
+        if not due:
+            return
+        _pending_hits[key_prefix] = Counter()
+        _last_flush[key_prefix] = now
+    flush_hits(key_prefix, pending)
+
+
+def flush_hits(key_prefix, pending= None):
+    if pending is None:
+        with _lock:
+            pending = _pending_hits.pop(key_prefix, Counter())
+    if not pending:
+        return
+    # leitura-modificação-escrita não atômica: contagens aproximadas bastam aqui
+    totals = Counter(cache.get(_freq_key(key_prefix)) or {})
+    totals.update(pending)
+    cache.set(_freq_key(key_prefix), dict(totals.most_common(MAX_TRACKED)), timeout= None)
+
+
+def top_requests(key_prefix, limit):
+    totals = Counter(cache.get(_freq_key(key_prefix)) or {})
+    return [signature for signature, _ in totals.most_common(limit)]
+
+
+def cache_response(timeout, key_prefix= 'default'):
+    """
+    Como o cache_page, mas guarda a resposta já comprimida (gzip e, se o pacote
+    brotli estiver instalado, br). A compressão é feita uma vez por preenchimento
+    do cache; os acertos servem os bytes guardados conforme o Accept-Encoding.
+    Só respostas JSON 200 de GET/HEAD são guardadas (os dois usam a mesma entrada).
+
+    Entradas vencidas (pelo tempo ou por invalidate()) ficam mais STALE_TTL
+    segundos no cache: uma única requisição as recalcula e as demais recebem a
+    versão anterior. As combinações pedidas são contadas para o warm().
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            key = _cache_key(key_prefix, request)
+            lock_key = f'{key}:lock'
+            refresh = getattr(request, '_respcache_refresh', False)
+            entry, generation = None, current_generation(key_prefix)
+            if not refresh:
+                entry = cache.get(key)
+
+            locked = False
+            if entry is not None:
+                if _is_fresh(entry, generation):
+                    _record_hit(key_prefix, request)
+                    return apply_entry(HttpResponse(), entry, request)
+                locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+                if not locked:
+                    # outra requisição já está recalculando: serve a versão anterior
+                    _record_hit(key_prefix, request)
+                    return apply_entry(HttpResponse(), entry, request)
+            elif not refresh:
+                locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+                if not locked:
+                    entry = _wait_for_entry(key, generation)
+                    if entry is not None:
+                        _record_hit(key_prefix, request)
+                        return apply_entry(HttpResponse(), entry, request)
+                    # quem tem o lock demorou demais: calcula sem coordenar
+
+            def store(resp):
+                try:
+                    if _cacheable(resp):
+                        new_entry = make_entry(resp, timeout, generation)
+                        cache.set(key, new_entry, timeout + STALE_TTL)
+                        apply_entry(resp, new_entry, request)
+                        if not refresh:
+                            _record_hit(key_prefix, request)
+                finally:
+                    if locked:
+                        cache.delete(lock_key)
+                return None
+
+            try:
+                response = view_func(request, *args, **kwargs)
+            except BaseException:
+                if locked:
+                    cache.delete(lock_key)
+                raise
+
+            # respostas do DRF só são renderizadas depois de sair da view
+            if getattr(response, 'is_rendered', True) is False:
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+            return response
+        return wrapper
+    return decorator
+
+
+def _warm_request(secure, host, full_path, accept):
+    # GET interno (não passa por throttling nem consome a cota de 127.0.0.1)
+    parts = urlsplit(full_path)
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': unquote_to_bytes(parts.path).decode('iso-8859-1'),
+        'QUERY_STRING': parts.query,
+        'HTTP_HOST': host,
+        'SERVER_NAME': host.rsplit(':', 1)[0],
+        'SERVER_PORT': '443' if secure else '80',
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.url_scheme': 'https' if secure else 'http',
+        'wsgi.input': io.BytesIO(),
+        INTERNAL_REQUEST: True,
+    }
+    if accept:
+        environ['HTTP_ACCEPT'] = accept
+    request = WSGIRequest(environ)
+    request._respcache_refresh = True
+    return request
+
+
+def warm(key_prefix, limit= 20):
+    """
+    Recalcula as `limit` combinações mais pedidas do prefixo, chamando a view
+    em processo. Devolve [(caminho, status, segundos)].
+    """
+    results = []
+    for signature in top_requests(key_prefix, limit):
+        secure, host, full_path, accept = signature.split('|', 3)
+        request = _warm_request(secure == '1', host, full_path, accept)
+        started = time.monotonic()
+        try:
+            match = resolve(urlsplit(full_path).path)
+            response = match.func(request, *match.args, **match.kwargs)
+            if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+                response.render()
+            status = response.status_code
+        except Exception:
+            logger.exception('warm-up falhou para %s', full_path)
+            status = None
+        results.append((full_path, status, time.monotonic() - started))
+    return results
+
+
+def _run_scheduled_warm(key_prefix, limit):
+    with _lock:
+        _warm_timers.pop(key_prefix, None)
+    try:
+        warm(key_prefix, limit)
+    except Exception:
+        logger.exception('warm-up em segundo plano falhou (%s)', key_prefix)
+    finally:
+        connections.close_all()
+
+
+def schedule_warm(key_prefix, limit= 20, delay= 1.0):
+    # Agenda um warm() em thread; chamadas repetidas dentro de `delay` se juntam.
+    with _lock:
+        if key_prefix in _warm_timers:
+            return
+        timer = threading.Timer(delay, _run_scheduled_warm, args= (key_prefix, limit))
+        timer.daemon = True
+        _warm_timers[key_prefix] = timer
+    timer.start()
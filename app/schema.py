@@ -0,0 +1,181 @@
+"""
+Schema OpenAPI pré-gerado.
+
+Gerar o documento percorre todas as views e serializers (centenas de ms de CPU
+por requisição no SpectacularAPIView). Aqui ele é gerado uma vez por versão do
+código — no startup (OPENAPI_SCHEMA_WARM_ON_STARTUP), pelo comando
+`build_openapi_schema` ou na primeira requisição —, gravado em
+OPENAPI_SCHEMA_CACHE_DIR e servido da memória com ETag e variantes comprimidas.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+import drf_spectacular
+from django.apps import apps
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.views.decorators.http import require_safe
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+
+from app.response_cache import choose_encoding, compress_variants
+
+logger = logging.getLogger(__name__)
+
+# formato -> (arquivo, Content-Type); YAML é o padrão, como no SpectacularAPIView
+FORMATS = {
+    'yaml': ('openapi.yaml', 'application/vnd.oai.openapi; charset=utf-8'),
+    'json': ('openapi.json', 'application/vnd.oai.openapi+json'),
+}
+META_FILE = 'openapi.meta.json'
+# Clientes revalidam com If-None-Match (304 sem corpo) depois disso.
+MAX_AGE = 60
+
+_lock = threading.Lock()
+_loaded = None
+_source_hash = None
+
+
+def _hash_sources():
+    # Conteúdo dos .py dos apps do projeto (views, serializers, settings...) +
+    # versão do drf-spectacular: qualquer mudança gera outro schema.
+    base = Path(settings.BASE_DIR).resolve()
+    digest = hashlib.sha256(f'drf-spectacular {drf_spectacular.__version__}'.encode())
+    roots = sorted({
+        Path(config.path).resolve() for config in apps.get_app_configs()
+        if Path(config.path).resolve().is_relative_to(base)
+    })
+    for root in roots:
+        for path in sorted(root.rglob('*.py')):
+            digest.update(str(path.relative_to(base)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def code_version():
+    """APP_CODE_VERSION (ex.: SHA do commit, definido no build) ou um hash do código-fonte."""
+    global _source_hash
+    if settings.APP_CODE_VERSION:
+        return settings.APP_CODE_VERSION
+    if _source_hash is None:
+        _source_hash = _hash_sources()
+    return _source_hash
+
+
+def render_schema():
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request= None, public= True)
+    return {
+        'yaml': OpenApiYamlRenderer().render(schema, renderer_context= {}),
+        'json': OpenApiJsonRenderer().render(schema, renderer_context= {}),
+    }
+
+
+def _directory():
+    return Path(settings.OPENAPI_SCHEMA_CACHE_DIR)
+
+
+def read_schema(version):
+    # Documentos gravados para `version`, ou None se ausentes/de outra versão.
+    directory = _directory()
+    try:
+        meta = json.loads((directory / META_FILE).read_text(encoding= 'utf-8'))
+        if meta.get('version') != version:
+            return None
+        return {fmt: (directory / filename).read_bytes() for fmt, (filename, _) in FORMATS.items()}
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, data):
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def write_schema(version, documents):
+    directory = _directory()
+    directory.mkdir(parents= True, exist_ok= True)
+    for fmt, (filename, _) in FORMATS.items():
+        _write_atomic(directory / filename, documents[fmt])
+    # meta por último: só aponta para a versão depois que os documentos existem
+    _write_atomic(directory / META_FILE, json.dumps({'version': version}).encode())
+
+
+def _prepare(body):
+    # ETag fraca: a mesma para todas as codificações do mesmo documento
+    return {
+        'etag': f'W/"{hashlib.sha256(body).hexdigest()[:32]}"',
+        'variants': compress_variants(body),
+    }
+
+
+def build(force= False):
+    """
+    Garante o arquivo da versão atual do código e carrega os documentos na
+    memória do processo. Devolve True se o schema foi (re)gerado.
+    """
+    global _loaded
+    version = code_version()
+    with _lock:
+        documents = None if force else read_schema(version)
+        generated = documents is None
+        if generated:
+            documents = render_schema()
+            try:
+                write_schema(version, documents)
+            except OSError:
+                # sem escrita no disco: segue servindo da memória deste processo
+                logger.warning('não foi possível gravar o schema em %s', _directory(), exc_info= True)
+        _loaded = {
+            'version': version,
+            'documents': {fmt: _prepare(body) for fmt, body in documents.items()},
+        }
+    return generated
+
+
+def get_schema():
+    loaded = _loaded
+    if loaded is None or loaded['version'] != code_version():
+        build()
+        loaded = _loaded
+    return loaded
+
+
+def warm_on_startup():
+    # Chamado pelo wsgi/asgi: um schema quebrado não deve impedir o boot.
+    if not settings.OPENAPI_SCHEMA_WARM_ON_STARTUP:
+        return
+    try:
+        build()
+    except Exception:
+        logger.exception('falha ao gerar o schema OpenAPI no startup')
+
+
+def _negotiate_format(request):
+    fmt = request.GET.get('format')
+    if fmt in FORMATS:
+        return fmt
+    return 'json' if 'json' in request.META.get('HTTP_ACCEPT', '') else 'yaml'
+
+
+@require_safe
+def schema_view(request):
+    fmt = _negotiate_format(request)
+    document = get_schema()['documents'][fmt]
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'), document['variants'])
+    body = document['variants'][encoding]
+
+    response = HttpResponse(body, content_type= FORMATS[fmt][1])
+    response['ETag'] = document['etag']
+    response['Content-Disposition'] = f'inline; filename="schema.{fmt}"'
+    if encoding != 'identity':
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+    patch_cache_control(response, public= True, max_age= MAX_AGE)
+    return get_conditional_response(request, etag= document['etag'], response= response)
@@ -1,7 +1,9 @@
 from pathlib import Path
 from datetime import timedelta
+from decimal import Decimal, InvalidOperation
 import os
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 # === Base dir ===
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -27,6 +29,16 @@ def env_list(name: str, default: str = "") -> list[str]:
     raw = os.getenv(name, default)
     return [item for item in (x.strip() for x in raw.split(",")) if item]
 
+def env_decimal_list(name: str, default: str = "") -> list[Decimal]:
+    # Valores numéricos, únicos e em ordem crescente; erro de configuração falha no startup
+    try:
+        values = [Decimal(item) for item in env_list(name, default)]
+    except InvalidOperation:
+        raise ImproperlyConfigured(f"{name} deve conter apenas números separados por vírgula.")
+    if not all(v.is_finite() for v in values) or any(a >= b for a, b in zip(values, values[1:])):
+        raise ImproperlyConfigured(f"{name} deve conter números finitos, únicos e em ordem crescente.")
+    return values
+
 # === Django básico ===
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "dev-secret-unsafe")
 DEBUG = env_bool("DJANGO_DEBUG", default=False)
@@ -58,12 +70,14 @@ INSTALLED_APPS = [
     "corsheaders",
 
     # Apps do projeto
+    "app",  # comandos transversais (ex.: replay_traffic)
     "catalog",
     "orders",
 ]
 
 # === Middlewares ===
 MIDDLEWARE = [
+    "app.logs.AccessLogMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -72,6 +86,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "app.traffic.TrafficRecorderMiddleware",
 ]
 
 ROOT_URLCONF = "app.urls"
@@ -116,6 +131,9 @@ if use_sqlite or missing:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            # banco de testes em arquivo: o SQLite em memória (cache compartilhado) não
+            # espera por locks, e os testes de concorrência usam várias conexões
+            "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
         }
     }
 else:
@@ -156,6 +174,30 @@ CACHES = {
     }
 }
 
+# === Cache de respostas (app.response_cache) ===
+# Compressão feita na requisição que preenche o cache: brotli 11 / gzip 9 custam
+# muito mais CPU por quase nenhum ganho de tamanho em JSON.
+RESPONSE_CACHE_GZIP_LEVEL = int(os.getenv("RESPONSE_CACHE_GZIP_LEVEL", "6"))
+RESPONSE_CACHE_BROTLI_QUALITY = int(os.getenv("RESPONSE_CACHE_BROTLI_QUALITY", "5"))
+
+# === Catálogo ===
+# Tombstones de produtos removidos (feed /products/changes/) são mantidos por N dias;
+# cursores mais antigos que isso expiram e exigem resync completo.
+CATALOG_TOMBSTONE_RETENTION_DAYS = int(os.getenv("CATALOG_TOMBSTONE_RETENTION_DAYS", "30"))
+# O feed só entrega linhas com updated_at até agora - N segundos: transações que
+# demorem mais que isso entre o updated_at e o COMMIT não aparecem no feed.
+CATALOG_CHANGES_SAFETY_LAG = float(os.getenv("CATALOG_CHANGES_SAFETY_LAG", "10"))
+# Limites das faixas de preço do facet ?facets=price (ex.: 0–50, 50–100, ..., 1000+)
+CATALOG_PRICE_BUCKETS = env_decimal_list("CATALOG_PRICE_BUCKETS", default="50,100,200,500,1000")
+# Recalcula em segundo plano as listagens mais pedidas após alterações no catálogo
+CATALOG_CACHE_WARM_ON_CHANGE = env_bool("CATALOG_CACHE_WARM_ON_CHANGE", default=False)
+CATALOG_CACHE_WARM_LIMIT = int(os.getenv("CATALOG_CACHE_WARM_LIMIT", "20"))
+
+# === Gravação de tráfego (replay_traffic) ===
+# Fração das requisições gravadas em JSONL; 0 desliga o middleware.
+TRAFFIC_RECORD_RATE = float(os.getenv("TRAFFIC_RECORD_RATE", "0"))
+TRAFFIC_RECORD_PATH = os.getenv("TRAFFIC_RECORD_PATH", str(BASE_DIR / "traffic.jsonl"))
+
 # === CORS ===
 CORS_ALLOW_ALL_ORIGINS = env_bool("CORS_ALLOW_ALL_ORIGINS", default=DEBUG)
 CORS_ALLOWED_ORIGINS = [] if CORS_ALLOW_ALL_ORIGINS else env_list("CORS_ALLOWED_ORIGINS", default="")
@@ -177,8 +219,9 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 10,
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        # iguais aos do DRF, mas ignoram requisições internas (replay, warm-up)
+        "app.throttling.AnonRateThrottle",
+        "app.throttling.UserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "60/minute",
@@ -199,13 +242,22 @@ SPECTACULAR_SETTINGS = {
     "VERSION": "1.0.0",
     "SERVE_INCLUDE_SCHEMA": False,
 }
+# /api/schema/ serve o documento pré-gerado (app.schema) em vez de gerá-lo a cada
+# requisição; é regerado quando a versão do código muda (APP_CODE_VERSION, ex.: SHA
+# do commit, ou um hash do código-fonte se vazio).
+OPENAPI_SCHEMA_CACHE = env_bool("OPENAPI_SCHEMA_CACHE", default=True)
+OPENAPI_SCHEMA_CACHE_DIR = os.getenv("OPENAPI_SCHEMA_CACHE_DIR", str(BASE_DIR / ".openapi"))
+OPENAPI_SCHEMA_WARM_ON_STARTUP = env_bool("OPENAPI_SCHEMA_WARM_ON_STARTUP", default=not DEBUG)
+APP_CODE_VERSION = os.getenv("APP_CODE_VERSION", "")
 
-# === Logging (simples e útil em dev) ===
+# === Logging ===
+# JSON por linha, escrito por uma thread à parte (app.logs.QueueStreamHandler):
+# no caminho da requisição o log só é enfileirado.
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
     "handlers": {
-        "console": {"class": "logging.StreamHandler"},
+        "console": {"class": "app.logs.QueueStreamHandler"},
     },
     "root": {
         "handlers": ["console"],
@@ -217,3 +269,13 @@ LOGGING = {
         "orders": {"level": "INFO", "handlers": ["console"]},
     },
 }
+
+# Access log (app.logs.AccessLogMiddleware): erros e requisições lentas sempre;
+# sucessos por amostragem (por view em ACCESS_LOG_HOT_ROUTES, senão a taxa padrão).
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+ACCESS_LOG_SLOW_MS = float(os.getenv("ACCESS_LOG_SLOW_MS", "500"))
+ACCESS_LOG_HOT_ROUTES = {
+    "product-list": 0.05,
+    "product-detail": 0.05,
+    "product-batch": 0.05,
+}
@@ -0,0 +1,20 @@
+from rest_framework import throttling
+
+# Chave do environ WSGI (não vem de cabeçalho HTTP, então clientes não a forjam)
+# marcando requisições geradas pelo próprio processo: replay_traffic em processo
+# e warm-up do cache. Elas não contam nem são barradas pelo throttling.
+INTERNAL_REQUEST = 'app.internal_request'
+
+
+def is_internal(request):
+    return bool(request.META.get(INTERNAL_REQUEST))
+
+
+class AnonRateThrottle(throttling.AnonRateThrottle):
+    def allow_request(self, request, view):
+        return is_internal(request) or super().allow_request(request, view)
+
+
+class UserRateThrottle(throttling.UserRateThrottle):
+    def allow_request(self, request, view):
+        return is_internal(request) or super().allow_request(request, view)
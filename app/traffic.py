@@ -0,0 +1,174 @@
+"""
+Gravação e replay de tráfego real.
+
+TrafficRecorderMiddleware grava uma amostra das requisições em JSONL (método,
+rota, query, formato do corpo e papel do usuário; nunca os valores do corpo).
+O comando `replay_traffic` reexecuta o arquivo em processo ou via HTTP e
+reporta latência por rota.
+"""
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+MAX_BODY_BYTES = 64 * 1024
+
+_write_lock = threading.Lock()
+
+
+def body_shape(value):
+    # {"product_id": 3, "tags": ["a"]} -> {"product_id": "int", "tags": ["str"]}
+    if isinstance(value, dict):
+        return {k: body_shape(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [body_shape(value[0])] if value else []
+    if value is None:
+        return 'null'
+    return type(value).__name__
+
+
+def synthesize_body(shape):
+    # Inverso aproximado de body_shape: valores de exemplo com os mesmos tipos.
+    if isinstance(shape, dict):
+        return {k: synthesize_body(v) for k, v in shape.items()}
+    if isinstance(shape, list):
+        return [synthesize_body(shape[0])] if shape else []
+    return {'int': 1, 'float': 1.0, 'bool': True, 'str': 'x', 'null': None}.get(shape)
+
+
+def user_role(user):
+    if user is None or not user.is_authenticated:
+        return 'anon'
+    return 'staff' if user.is_staff else 'user'
+
+
+class TrafficRecorderMiddleware:
+    """
+    Grava uma fração (TRAFFIC_RECORD_RATE) das requisições em TRAFFIC_RECORD_PATH.
+    Com taxa 0 (padrão) o middleware se desliga na inicialização.
+    """
+
+    def __init__(self, get_response):
+        self.rate = settings.TRAFFIC_RECORD_RATE
+        if self.rate <= 0:
+            raise MiddlewareNotUsed()
+        self.path = settings.TRAFFIC_RECORD_PATH
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= self.rate:
+            return self.get_response(request)
+
+        # o gravador nunca derruba a requisição: Content-Length inválido só fica sem formato
+        shape = None
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if request.content_type == 'application/json' and 0 < length <= MAX_BODY_BYTES:
+            try:
+                shape = body_shape(json.loads(request.body))
+            except ValueError:
+                shape = None
+
+        started = time.monotonic()
+        response = self.get_response(request)
+        match = request.resolver_match
+
+        record = {
+            'ts': time.time(),
+            'method': request.method,
+            'route': match.view_name if match else None,
+            'path': request.path,
+            'query': {k: request.GET.getlist(k) for k in request.GET},
+            'body_shape': shape,
+            # o DRF repassa o usuário autenticado (JWT) para o HttpRequest
+            'role': user_role(getattr(request, 'user', None)),
+            'status': response.status_code,
+            'duration_ms': round((time.monotonic() - started) * 1000, 2),
+        }
+        line = json.dumps(record, ensure_ascii= False) + '\n'
+        with _write_lock, open(self.path, 'a', encoding= 'utf-8') as fh:
+            fh.write(line)
+        return response
+
+
+def load_records(path, methods= None):
+    records = []
+    with open(path, encoding= 'utf-8') as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if methods is None or record.get('method') in methods:
+                records.append(record)
+    records.sort(key= lambda r: r.get('ts', 0))
+    return records
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    # nearest-rank
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def replay(records, send, concurrency= 4, speed= 0.0):
+    """
+    Reexecuta `records` com `send(record) -> status` (levanta em erro de transporte).
+
+    speed > 0 respeita os intervalos gravados divididos por speed (2 = duas vezes
+    mais rápido); speed 0 dispara tudo o mais rápido que a concorrência permite.
+    Devolve [(record, status | None, segundos)].
+    """
+    if not records:
+        return []
+    t0 = records[0].get('ts', 0)
+    start = time.monotonic()
+
+    def run(record):
+        if speed > 0:
+            delay = (record.get('ts', t0) - t0) / speed - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+        began = time.monotonic()
+        try:
+            status = send(record)
+        except Exception:
+            status = None
+        return record, status, time.monotonic() - began
+
+    with ThreadPoolExecutor(max_workers= concurrency) as pool:
+        return list(pool.map(run, records))
+
+
+def summarize(results):
+    # Por rota: quantidade, percentis de latência (ms) e taxa de erro (5xx/transporte).
+    by_route = {}
+    for record, status, elapsed in results:
+        route = f"{record.get('method')} {record.get('route') or record.get('path')}"
+        by_route.setdefault(route, []).append((status, elapsed * 1000))
+
+    rows = []
+    for route, samples in sorted(by_route.items()):
+        latencies = sorted(ms for _, ms in samples)
+        errors = sum(1 for status, _ in samples if status is None or status >= 500)
+        client_errors = sum(1 for status, _ in samples if status is not None and 400 <= status < 500)
+        rows.append({
+            'route': route,
+            'count': len(samples),
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'max': latencies[-1],
+            'error_rate': errors / len(samples),
+            'client_error_rate': client_errors / len(samples),
+        })
+    return rows
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
@@ -10,6 +11,7 @@ from drf_spectacular.views import (
     SpectacularRedocView,
 )
 
+from app.schema import schema_view
 from catalog.views import CategoryViewSet, ProductViewSet
 from orders.views import OrderViewSet
 
@@ -41,7 +43,8 @@ urlpatterns = [
     path("api/auth/token/refresh/", TokenRefreshView.as_view(), name="jwt_token_refresh"),
 
     # Docs
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    # OPENAPI_SCHEMA_CACHE: documento pré-gerado (ETag + gzip/br); Swagger e Redoc usam a mesma rota
+    path("api/schema/", schema_view if settings.OPENAPI_SCHEMA_CACHE else SpectacularAPIView.as_view(), name="schema"),
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
     path("api/schema/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
 
@@ -5,3 +5,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+# gera/carrega o schema OpenAPI antes da primeira requisição
+from app.schema import warm_on_startup  # noqa: E402
+
+warm_on_startup()
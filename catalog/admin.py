@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Product
+from .models import Category, Product, ProductTombstone
 
 
 @admin.register(Category)
@@ -15,3 +15,9 @@ class ProductAdmin(admin.ModelAdmin):
     list_filter = ('is_active', 'category')
     search_fields = ('name', 'sku', 'description')
     ordering = ('-created_at',)
+
+
+@admin.register(ProductTombstone)
+class ProductTombstoneAdmin(admin.ModelAdmin):
+    list_display = ('id', 'product_id', 'sku', 'deleted_at')
+    search_fields = ('sku',)
@@ -0,0 +1,226 @@
+"""
+Índice de prefixos em memória para o autocomplete do catálogo.
+
+Cada worker monta o seu na primeira consulta (só produtos ativos). O índice é
+uma única lista ordenada de strings "<termo>\\x00<id>", em que os termos são o
+SKU e o nome a partir de cada palavra ("camiseta azul g", "azul g", "g"), já
+normalizados: uma busca é um bisect + varredura das entradas com o prefixo.
+
+Alterações de Product incrementam uma geração no cache compartilhado
+(mark_changed, via signal). Quando a geração muda — ou a cada SYNC_INTERVAL
+segundos, para o que escapa dos signals —, o worker aplica só os produtos
+alterados e removidos desde a última sincronização.
+
+As listas publicadas nunca são alteradas: cada sincronização monta uma cópia
+e troca o par (entradas, produtos) de uma vez, então buscas concorrentes leem
+um snapshot consistente sem lock.
+"""
+import bisect
+import heapq
+import sys
+import threading
+import time
+import unicodedata
+
+from django.utils import timezone
+
+from app.response_cache import current_generation, invalidate
+
+from .changes import safety_lag
+from .models import Product, ProductTombstone
+
+GENERATION = 'catalog-autocomplete'
+SYNC_INTERVAL = 60
+# termos por nome (um por palavra); limita o tamanho do índice para nomes longos
+MAX_WORDS = 8
+# termos (e buscas) truncados: prefixos maiores que isso raramente mudam o resultado
+MAX_TERM_LENGTH = 32
+SEP = '\x00'
+# até aqui, o delta é aplicado com bisect sobre uma cópia da lista (O(N) por termo);
+# acima, as entradas são refeitas num único merge
+INPLACE_MAX_CHANGES = 50
+# delta acima desta fração do catálogo (e de INPLACE_MAX_CHANGES): mais barato recarregar tudo
+REBUILD_FRACTION = 0.25
+
+
+def normalize(text):
+    # minúsculas, sem acentos e com espaços colapsados ("Café  Moído" -> "cafe moido")
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c) and c != SEP)
+    return ' '.join(stripped.split())
+
+
+def terms(name, sku):
+    words = normalize(name).split(' ')
+    result = {' '.join(words[i:])[:MAX_TERM_LENGTH].rstrip() for i in range(min(len(words), MAX_WORDS))}
+    result.add(normalize(sku)[:MAX_TERM_LENGTH])
+    result.discard('')
+    return result
+
+
+def mark_changed():
+    invalidate(GENERATION)
+
+
+def _entries_for(pk, name, sku):
+    return [f'{term}{SEP}{pk}' for term in terms(name, sku)]
+
+
+class PrefixIndex:
+    def __init__(self):
+        # (entradas ordenadas, {id: (nome, sku)}), sempre trocados juntos
+        self._data = ([], {})
+        self.generation = None
+        self.synced_at = None
+        self.synced_monotonic = 0.0
+        self.build_ms = None
+        self._lock = threading.Lock()
+
+    @property
+    def entries(self):
+        return self._data[0]
+
+    @property
+    def products(self):
+        return self._data[1]
+
+    def _build(self, generation):
+        started, t0 = timezone.now(), time.monotonic()
+        products, entries = {}, []
+        rows = Product.objects.filter(is_active= True).order_by().values_list('id', 'name', 'sku')
+        for pk, name, sku in rows.iterator(chunk_size= 2000):
+            products[pk] = (name, sku)
+            entries.extend(_entries_for(pk, name, sku))
+        entries.sort()
+        self._data = (entries, products)
+        self.build_ms = round((time.monotonic() - t0) * 1000, 2)
+        self._synced(generation, started)
+
+    def _sync(self, generation):
+        # reaplica o que mudou desde a última sincronização; a folga safety_lag()
+        # cobre linhas com updated_at anterior ao COMMIT. Baixas de estoque também
+        # movem updated_at: linhas com nome/SKU iguais aos do índice são ignoradas.
+        started = timezone.now()
+        since = self.synced_at - safety_lag()
+        entries, products = self._data
+
+        upserts, removed = {}, set()
+        changed = Product.objects.filter(updated_at__gte= since).order_by().values_list('id', 'name', 'sku', 'is_active')
+        for pk, name, sku, is_active in changed:
+            if not is_active:
+                if pk in products:
+                    removed.add(pk)
+            elif products.get(pk) != (name, sku):
+                upserts[pk] = (name, sku)
+        for pk in ProductTombstone.objects.filter(deleted_at__gte= since).values_list('product_id', flat= True):
+            if pk in products:
+                removed.add(pk)
+                upserts.pop(pk, None)
+
+        touched = removed | set(upserts)
+        if not touched:
+            self._synced(generation, started)
+            return
+        if len(touched) > max(INPLACE_MAX_CHANGES, REBUILD_FRACTION * len(products)):
+            self._build(generation)
+            return
+
+        stale = [e for pk in touched if pk in products for e in _entries_for(pk, *products[pk])]
+        fresh = sorted(e for pk, (name, sku) in upserts.items() for e in _entries_for(pk, name, sku))
+        if len(touched) <= INPLACE_MAX_CHANGES:
+            new_entries = list(entries)
+            for entry in stale:
+                i = bisect.bisect_left(new_entries, entry)
+                if i < len(new_entries) and new_entries[i] == entry:
+                    del new_entries[i]
+            for entry in fresh:
+                bisect.insort(new_entries, entry)
+        else:
+            stale = set(stale)
+            new_entries = list(heapq.merge((e for e in entries if e not in stale), fresh))
+
+        new_products = {pk: value for pk, value in products.items() if pk not in removed}
+        new_products.update(upserts)
+        self._data = (new_entries, new_products)
+        self._synced(generation, started)
+
+    def _synced(self, generation, started):
+        self.generation = generation
+        self.synced_at = started
+        self.synced_monotonic = time.monotonic()
+
+    def ensure_fresh(self):
+        generation = current_generation(GENERATION)
+        if self._is_fresh(generation):
+            return
+        if self.synced_at is not None:
+            # já existe um snapshot: se outra requisição está sincronizando, serve-o
+            if not self._lock.acquire(blocking= False):
+                return
+        else:
+            self._lock.acquire()
+        try:
+            if self.synced_at is None:
+                self._build(generation)
+            elif not self._is_fresh(generation):
+                self._sync(generation)
+        finally:
+            self._lock.release()
+
+    def _is_fresh(self, generation):
+        return (
+            self.synced_at is not None
+            and self.generation == generation
+            and time.monotonic() - self.synced_monotonic < SYNC_INTERVAL
+        )
+
+    def search(self, query, limit):
+        """
+        Até `limit` produtos [{'id', 'name', 'sku'}] cujo SKU ou alguma palavra
+        do nome (seguida do resto do nome) começa com `query`. Ordem: termo mais
+        curto/alfabético primeiro, então um termo igual à busca vem antes.
+        """
+        # corta antes de normalizar para não processar entradas enormes
+        prefix = normalize(query[:MAX_TERM_LENGTH * 4])[:MAX_TERM_LENGTH].rstrip()
+        if not prefix or limit <= 0:
+            return []
+        entries, products = self._data
+        results, seen = [], set()
+        i = bisect.bisect_left(entries, prefix)
+        while i < len(entries) and len(results) < limit:
+            entry = entries[i]
+            if not entry.startswith(prefix):
+                break
+            i += 1
+            pk = int(entry.rpartition(SEP)[2])
+            product = products.get(pk)
+            if product is None or pk in seen:
+                continue
+            seen.add(pk)
+            results.append({'id': pk, 'name': product[0], 'sku': product[1]})
+        return results
+
+    def stats(self):
+        entries, products = self._data
+        memory = sys.getsizeof(entries) + sum(sys.getsizeof(e) for e in entries)
+        memory += sys.getsizeof(products) + sum(
+            sys.getsizeof(pk) + sys.getsizeof(value) + sys.getsizeof(value[0]) + sys.getsizeof(value[1])
+            for pk, value in products.items()
+        )
+        return {
+            'products': len(products),
+            'entries': len(entries),
+            'memory_bytes': memory,
+            'build_ms': self.build_ms,
+            'synced_at': self.synced_at,
+            'generation': self.generation,
+        }
+
+
+# um índice por processo (worker)
+index = PrefixIndex()
+
+
+def search(query, limit):
+    index.ensure_fresh()
+    return index.search(query, limit)
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from app.response_cache import invalidate, schedule_warm
+
+# Cache por item dos produtos serializados (usado pelo /products/batch/).
+# Só produtos ativos entram aqui; os signals em catalog.signals invalidam as
+# entradas quando o produto ou sua categoria mudam.
+PRODUCT_CACHE_TIMEOUT = 300
+# prefixo do cache_response da listagem de produtos
+PRODUCT_LIST_CACHE = 'catalog-products'
+
+
+def _key(by, value):
+    return f'catalog:product:{by}:{value}'
+
+
+def get_products(by, values):
+    found = cache.get_many([_key(by, v) for v in values])
+    result = {}
+    for v in values:
+        data = found.get(_key(by, v))
+        # a entrada por SKU pode ter sobrado de um SKU antigo do produto
+        if data is not None and data.get(by) == v:
+            result[v] = data
+    return result
+
+
+def set_products(by, data_by_value):
+    cache.set_many(
+        {_key(by, v): data for v, data in data_by_value.items()},
+        timeout= PRODUCT_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_products(pairs):
+    # pairs: iterável de (id, sku)
+    keys = []
+    for pk, sku in pairs:
+        keys += [_key('id', pk), _key('sku', sku)]
+    if keys:
+        cache.delete_many(keys)
+
+
+def invalidate_product_lists():
+    # As páginas em cache viram stale (servidas enquanto uma requisição recalcula);
+    # com CATALOG_CACHE_WARM_ON_CHANGE, as combinações mais pedidas são recalculadas
+    # em segundo plano logo após a alteração.
+    invalidate(PRODUCT_LIST_CACHE)
+    if settings.CATALOG_CACHE_WARM_ON_CHANGE:
+        schedule_warm(PRODUCT_LIST_CACHE, settings.CATALOG_CACHE_WARM_LIMIT)
@@ -0,0 +1,107 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ProductTombstone
+
+
+def safety_lag():
+    # Linhas com updated_at muito recente podem pertencer a transações ainda não
+    # confirmadas (o timestamp é gerado antes do COMMIT); ficam para a próxima
+    # chamada. Limite: uma transação que confirme mais de CATALOG_CHANGES_SAFETY_LAG
+    # segundos depois do seu updated_at fica para trás do cursor e não é entregue.
+    return timedelta(seconds= settings.CATALOG_CHANGES_SAFETY_LAG)
+
+
+class CursorError(ValueError):
+    pass
+
+
+class CursorExpired(Exception):
+    pass
+
+
+def _retention():
+    return timedelta(days= settings.CATALOG_TOMBSTONE_RETENTION_DAYS)
+
+
+def encode_cursor(product_pos, tombstone_pos):
+    payload = {
+        'p': [product_pos[0].isoformat(), product_pos[1]],
+        't': [tombstone_pos[0].isoformat(), tombstone_pos[1]],
+    }
+    raw = json.dumps(payload, separators= (',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        positions = []
+        for key in ('p', 't'):
+            ts, pk = data[key]
+            ts = datetime.fromisoformat(ts)
+            if timezone.is_naive(ts):
+                raise CursorError(cursor)
+            positions.append((ts, int(pk)))
+    except (ValueError, KeyError, TypeError):
+        raise CursorError(cursor)
+    return tuple(positions)
+
+
+def _after(qs, field, pos):
+    ts, pk = pos
+    return qs.filter(Q(**{f'{field}__gt': ts}) | Q(**{field: ts, 'id__gt': pk}))
+
+
+def _page(qs, field, pos, upper, limit):
+    # Percorre qs por (field, id) a partir de pos; devolve (linhas, nova posição, há mais?)
+    qs = qs.filter(**{f'{field}__lte': upper})
+    if pos is not None:
+        qs = _after(qs, field, pos)
+    rows = list(qs.order_by(field, 'id')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if rows:
+        last = (getattr(rows[-1], field), rows[-1].id)
+    else:
+        last = pos or (upper, 0)
+    # fim do fluxo: tudo até "upper" já foi visto, então o cursor avança até lá
+    new_pos = last if has_more else max(last, (upper, 0))
+    return rows, new_pos, has_more
+
+
+def fetch_changes(products, cursor= None, limit= 100):
+    """
+    Alterações de produtos e remoções (tombstones) após o cursor.
+
+    `products` é o queryset base (sem filtro de is_active). Levanta CursorError
+    para cursores malformados e CursorExpired quando as remoções posteriores ao
+    cursor podem já ter sido expurgadas (cliente precisa de resync completo).
+    """
+    now = timezone.now()
+    upper = now - safety_lag()
+    cutoff = now - _retention()
+
+    product_pos = tombstone_pos = None
+    if cursor:
+        product_pos, tombstone_pos = decode_cursor(cursor)
+        if tombstone_pos[0] < cutoff:
+            raise CursorExpired(cursor)
+
+    rows, product_pos, products_more = _page(products, 'updated_at', product_pos, upper, limit)
+    tombstones = ProductTombstone.objects.filter(deleted_at__gte= cutoff)
+    dead, tombstone_pos, tombstones_more = _page(tombstones, 'deleted_at', tombstone_pos, upper, limit)
+
+    return {
+        'products': rows,
+        'tombstones': dead,
+        'next_cursor': encode_cursor(product_pos, tombstone_pos),
+        'has_more': products_more or tombstones_more,
+        'cursor_expires_at': tombstone_pos[0] + _retention(),
+    }
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.db.models import Case, Count, IntegerField, Value, When
+
+AVAILABLE_FACETS = ('category', 'price')
+
+
+def parse_facets(raw):
+    # "category,price" -> ['category', 'price']; levanta ValueError com os nomes inválidos
+    names = list(dict.fromkeys(x.strip() for x in (raw or '').split(',') if x.strip()))
+    unknown = [n for n in names if n not in AVAILABLE_FACETS]
+    if unknown:
+        raise ValueError(', '.join(unknown))
+    return names
+
+
+def compute_facets(qs, names):
+    """
+    Contagens por categoria e/ou faixa de preço sobre o queryset já filtrado,
+    numa única consulta agrupada (GROUP BY categoria, faixa).
+    """
+    if not names:
+        return {}
+
+    # já validados (numéricos, únicos, crescentes) em settings.py
+    edges = settings.CATALOG_PRICE_BUCKETS
+    group_by = []
+    qs = qs.order_by()
+    if 'category' in names:
+        group_by += ['category_id', 'category__name']
+    if 'price' in names:
+        qs = qs.annotate(price_bucket= Case(
+            *[When(price__lt= edge, then= Value(i)) for i, edge in enumerate(edges)],
+            default= Value(len(edges)),
+            output_field= IntegerField(),
+        ))
+        group_by.append('price_bucket')
+
+    rows = qs.values(*group_by).annotate(n= Count('id'))
+
+    categories, buckets = {}, [0] * (len(edges) + 1)
+    for row in rows:
+        if 'category' in names:
+            entry = categories.setdefault(row['category_id'], {'id': row['category_id'], 'name': row['category__name'], 'count': 0})
+            entry['count'] += row['n']
+        if 'price' in names:
+            buckets[row['price_bucket']] += row['n']
+
+    facets = {}
+    if 'category' in names:
+        facets['category'] = sorted(categories.values(), key= lambda c: (-c['count'], c['name']))
+    if 'price' in names:
+        # limites como string, no mesmo formato do campo price
+        bounds = [None, *(format(edge, '.2f') for edge in edges), None]
+        facets['price'] = [
+            {'min': bounds[i], 'max': bounds[i + 1], 'count': count}
+            for i, count in enumerate(buckets)
+        ]
+    return facets
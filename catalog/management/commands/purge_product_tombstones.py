@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from catalog.models import ProductTombstone
+
+
+class Command(BaseCommand):
+    help = 'Remove tombstones de produtos mais antigos que CATALOG_TOMBSTONE_RETENTION_DAYS.'
+
+    def handle(self, *args, **opts):
+        cutoff = timezone.now() - timedelta(days= settings.CATALOG_TOMBSTONE_RETENTION_DAYS)
+        deleted, _ = ProductTombstone.objects.filter(deleted_at__lt= cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} tombstone(s) removido(s).'))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.response_cache import warm
+from catalog.cache import PRODUCT_LIST_CACHE
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula no cache as listagens de produtos mais pedidas (pelas frequências registradas). '
+        'Requer cache compartilhado (Redis/Memcached) para aquecer os workers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=settings.CATALOG_CACHE_WARM_LIMIT,
+                            help='Quantidade de combinações de filtros a aquecer.')
+
+    def handle(self, *args, **opts):
+        results = warm(PRODUCT_LIST_CACHE, opts['limit'])
+        for path, status, elapsed in results:
+            self.stdout.write(f'{status or "erro"}  {elapsed * 1000:7.1f} ms  {path}')
+        ok = sum(1 for _, status, _ in results if status == 200)
+        self.stdout.write(self.style.SUCCESS(f'{ok}/{len(results)} listagem(ns) aquecida(s).'))
@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils.text import slugify
 from django.db.models import Q
+from django.utils import timezone
 
 
 class Category(models.Model):
@@ -40,12 +41,21 @@ class Product(models.Model):
         indexes = [
             models.Index(fields=['slug']),
             models.Index(fields=['is_active']),
+            # feed de alterações (/products/changes/) percorre por (updated_at, id)
+            models.Index(fields=['updated_at', 'id']),
         ]
         constraints = [
             models.CheckConstraint(check=Q(price__gte=0), name="product_price_gte_0"),
             models.CheckConstraint(check=Q(stock__gte=0), name="product_stock_gte_0"),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # SKU como está no banco: numa troca de SKU, o signal também invalida o cache do antigo
+        instance._saved_sku = instance.__dict__.get('sku')
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(f'{self.name}-{self.sku}')
@@ -53,3 +63,18 @@ class Product(models.Model):
 
     def __str__(self):
         return f'{self.name} ({self.sku})'
+
+
+class ProductTombstone(models.Model):
+    # Registro de produtos removidos, para o feed de alterações (delta sync).
+    product_id = models.BigIntegerField()
+    sku = models.CharField(max_length= 50)
+    deleted_at = models.DateTimeField(default= timezone.now)
+
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [models.Index(fields=['deleted_at', 'id'])]
+
+    def __str__(self):
+        return f'{self.sku} (removido em {self.deleted_at:%Y-%m-%d %H:%M})'
@@ -1,13 +1,15 @@
 from rest_framework import serializers
+from app.fieldsets import SparseFieldsetSerializerMixin
 from .models import Category, Product
+from .stock import MAX_STOCK
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name']
         read_only_fields = ['id']
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     # nome da categoria como somente leitura
     category_name = serializers.ReadOnlyField(source= 'category.name')
 
@@ -15,3 +17,18 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = ['id', 'sku', 'name', 'price', 'stock', 'is_active', 'category', 'category_name']
         read_only_fields = ['id', 'category_name']
+
+
+class StockUpdateSerializer(serializers.Serializer):
+    # um ajuste: {"sku": "A", "delta": -3} ou {"sku": "A", "absolute": 10}
+    sku = serializers.CharField(max_length= 50)
+    delta = serializers.IntegerField(required= False, min_value= -MAX_STOCK, max_value= MAX_STOCK)
+    absolute = serializers.IntegerField(required= False, min_value= 0, max_value= MAX_STOCK)
+
+    def validate(self, attrs):
+        if ('delta' in attrs) == ('absolute' in attrs):
+            raise serializers.ValidationError('Informe delta ou absolute (apenas um dos dois).')
+        return attrs
+
+class StockBatchSerializer(serializers.Serializer):
+    updates = StockUpdateSerializer(many= True, allow_empty= False, max_length= 1000)
@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import autocomplete
+from .cache import invalidate_product_lists, invalidate_products
+from .models import Category, Product, ProductTombstone
+
+
+@receiver([post_save, post_delete], sender= Product)
+def product_changed(sender, instance, **kwargs):
+    pairs = [(instance.pk, instance.sku)]
+    # a entrada do SKU antigo ainda tem sku == antigo e passaria pela checagem do get_products
+    old_sku = getattr(instance, '_saved_sku', None)
+    if old_sku and old_sku != instance.sku:
+        pairs.append((instance.pk, old_sku))
+    instance._saved_sku = instance.sku
+    invalidate_products(pairs)
+    transaction.on_commit(invalidate_product_lists)
+    transaction.on_commit(autocomplete.mark_changed)
+
+
+@receiver(post_save, sender= Category)
+def category_changed(sender, instance, created, **kwargs):
+    # category_name faz parte do produto serializado: além do cache, o updated_at
+    # dos produtos avança para a mudança chegar ao feed /products/changes/
+    # (update() não dispara signals nem auto_now)
+    if not created:
+        invalidate_products(instance.products.values_list('id', 'sku'))
+        instance.products.update(updated_at= timezone.now())
+        transaction.on_commit(invalidate_product_lists)
+
+
+@receiver(post_delete, sender= Product)
+def product_deleted(sender, instance, **kwargs):
+    ProductTombstone.objects.create(product_id= instance.pk, sku= instance.sku)
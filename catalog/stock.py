@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+
+from .cache import invalidate_product_lists, invalidate_products
+from .models import Product
+
+# maior valor de PositiveIntegerField (integer no Postgres); acima disso o UPDATE
+# falharia com "integer out of range" e derrubaria o lote inteiro
+MAX_STOCK = 2147483647
+
+
+def coalesce_updates(updates):
+    """
+    Junta as operações repetidas de um SKU, na ordem recebida:
+    {'sku': {'absolute': 10 | None, 'delta': soma dos deltas após o último absolute, 'ops': n}}
+    """
+    merged = {}
+    for upd in updates:
+        entry = merged.setdefault(upd['sku'], {'absolute': None, 'delta': 0, 'ops': 0})
+        entry['ops'] += 1
+        if upd.get('absolute') is not None:
+            entry['absolute'], entry['delta'] = upd['absolute'], 0
+        else:
+            entry['delta'] += upd['delta']
+    return merged
+
+
+def apply_stock_updates(updates):
+    """
+    Aplica um lote de ajustes de estoque com um SELECT ... FOR UPDATE e um único
+    UPDATE (CASE por id). SKUs cujo estoque ficaria negativo (product_stock_gte_0)
+    ou acima de MAX_STOCK são rejeitados individualmente, sem abortar o lote. O cache do catálogo é
+    invalidado uma vez por lote.
+    """
+    merged = coalesce_updates(updates)
+    results = {}
+    with transaction.atomic():
+        rows = (
+            Product.objects.select_for_update()
+            .filter(sku__in= list(merged))
+            .only('id', 'sku', 'stock')
+        )
+        current = {p.sku: p for p in rows}
+
+        new_stock = {}
+        for sku, op in merged.items():
+            product = current.get(sku)
+            if product is None:
+                results[sku] = {'sku': sku, 'status': 'not_found', 'ops': op['ops']}
+                continue
+            base = op['absolute'] if op['absolute'] is not None else product.stock
+            target = base + op['delta']
+            if not 0 <= target <= MAX_STOCK:
+                results[sku] = {'sku': sku, 'status': 'rejected', 'stock': product.stock,
+                                'requested': target, 'ops': op['ops']}
+                continue
+            new_stock[product.pk] = target
+            results[sku] = {'sku': sku, 'status': 'updated', 'stock': target,
+                            'previous': product.stock, 'ops': op['ops']}
+
+        if new_stock:
+            # update() não dispara signals nem auto_now: updated_at vai explícito
+            # (o feed /products/changes/ depende dele)
+            Product.objects.filter(pk__in= list(new_stock)).update(
+                stock= Case(
+                    *[When(pk= pk, then= Value(stock)) for pk, stock in new_stock.items()],
+                    output_field= IntegerField(),
+                ),
+                updated_at= timezone.now(),
+            )
+            changed = [(p.pk, p.sku) for p in current.values() if p.pk in new_stock]
+            transaction.on_commit(lambda: invalidate_products(changed))
+            transaction.on_commit(invalidate_product_lists)
+
+    return [results[sku] for sku in merged]
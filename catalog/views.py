@@ -1,44 +1,178 @@
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
+from app.fieldsets import SparseFieldsetMixin
+from . import autocomplete
+from . import cache as product_cache
+from .changes import CursorError, CursorExpired, fetch_changes
+from .facets import AVAILABLE_FACETS, compute_facets, parse_facets
 from .models import Category, Product
-from .serializers import CategorySerializer, ProductSerializer
+from .serializers import CategorySerializer, ProductSerializer, StockBatchSerializer
+from .stock import apply_stock_updates
 
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from app.response_cache import cache_response
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    fieldset_columns = {'id': (), 'name': ('name',)}
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
             return [AllowAny()]
         return [IsAdminUser()]
 
-class ProductViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        return self.narrow_queryset(super().get_queryset())
+
+class ProductViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Product.objects.select_related('category').all()
     serializer_class = ProductSerializer
+    # ?fields= / ?exclude=: sem category_name não há JOIN com categoria
+    fieldset_columns = {
+        'id': (), 'sku': ('sku',), 'name': ('name',), 'price': ('price',), 'stock': ('stock',),
+        'is_active': ('is_active',), 'category': ('category',), 'category_name': ('category', 'category__name'),
+    }
+    fieldset_select_related = {'category_name': 'category'}
 
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['category', 'is_active']
     search_fields = ['name', 'sku']
     ordering_fields = ['price', 'name']
 
+    BATCH_MAX_ITEMS = 100
+    CHANGES_MAX_LIMIT = 1000
+    AUTOCOMPLETE_DEFAULT_LIMIT = 8
+    AUTOCOMPLETE_MAX_LIMIT = 20
+
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'batch', 'changes', 'autocomplete']:
             return [AllowAny()]
         return [IsAdminUser()]
 
     def get_queryset(self):
-        qs = Product.objects.all().select_related('category')
-        if self.action in ['list', 'retrieve']:
+        qs = self.narrow_queryset(Product.objects.all())
+        if self.action in ['list', 'retrieve', 'batch']:
             qs = qs.filter(is_active= True)
         return qs
 
-    @method_decorator(cache_page(60))
+    @method_decorator(cache_response(60, key_prefix= product_cache.PRODUCT_LIST_CACHE))
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
\ No newline at end of file
+        # ?facets=category,price — contagens sobre os mesmos filtros, em cache junto com a página
+        try:
+            facets = parse_facets(request.query_params.get('facets'))
+        except ValueError as exc:
+            return Response(
+                {'facets': f'Facets inválidos: {exc}. Disponíveis: {", ".join(AVAILABLE_FACETS)}.'},
+                status= 400,
+            )
+        response = super().list(request, *args, **kwargs)
+        if facets:
+            response.data['facets'] = compute_facets(self.filter_queryset(self.get_queryset()), facets)
+        return response
+
+    @action(detail= False, methods=['get'])
+    def batch(self, request):
+        # GET /products/batch/?ids=1,2,3 ou ?skus=A,B — uma consulta para os
+        # itens fora do cache, mantendo a ordem pedida
+        ids_raw = request.query_params.get('ids', '')
+        skus_raw = request.query_params.get('skus', '')
+        if bool(ids_raw.strip()) == bool(skus_raw.strip()):
+            return Response({'detail': 'Informe ids ou skus (apenas um dos dois).'}, status= 400)
+
+        by = 'id' if ids_raw.strip() else 'sku'
+        raw = [x.strip() for x in (ids_raw or skus_raw).split(',') if x.strip()]
+        if by == 'id':
+            try:
+                raw = [int(x) for x in raw]
+            except ValueError:
+                return Response({'detail': 'ids deve conter apenas inteiros.'}, status= 400)
+        keys = list(dict.fromkeys(raw))
+        if len(keys) > self.BATCH_MAX_ITEMS:
+            return Response({'detail': f'Máximo de {self.BATCH_MAX_ITEMS} itens por requisição.'}, status= 400)
+
+        found = product_cache.get_products(by, keys)
+        pending = [k for k in keys if k not in found]
+        if pending:
+            qs = self.get_queryset().filter(**{f'{by}__in': pending}).order_by()
+            fetched = {row[by]: dict(row) for row in self.get_serializer(qs, many= True).data}
+            product_cache.set_products(by, fetched)
+            found.update(fetched)
+
+        return Response({
+            'results': [found[k] for k in keys if k in found],
+            'missing': [k for k in keys if k not in found],
+        })
+
+    @action(detail= False, methods=['get'])
+    def changes(self, request):
+        # GET /products/changes/?cursor=<opaco>&limit=N — delta sync: produtos
+        # alterados e removidos depois do cursor, em ordem de (updated_at, id)
+        try:
+            limit = int(request.query_params.get('limit', 100))
+        except ValueError:
+            return Response({'detail': 'limit deve ser inteiro.'}, status= 400)
+        limit = max(1, min(limit, self.CHANGES_MAX_LIMIT))
+
+        try:
+            page = fetch_changes(self.get_queryset(), request.query_params.get('cursor'), limit)
+        except CursorError:
+            return Response({'detail': 'cursor inválido.'}, status= 400)
+        except CursorExpired:
+            return Response(
+                {'detail': 'Cursor expirado; refaça a sincronização completa (sem cursor).', 'code': 'cursor_expired'},
+                status= status.HTTP_410_GONE,
+            )
+
+        # produtos desativados saem do catálogo público: para o cliente, contam como remoção
+        active = [p for p in page['products'] if p.is_active]
+        deleted = [
+            {'id': p.id, 'sku': p.sku, 'reason': 'inactive', 'at': p.updated_at}
+            for p in page['products'] if not p.is_active
+        ]
+        deleted += [
+            {'id': t.product_id, 'sku': t.sku, 'reason': 'deleted', 'at': t.deleted_at}
+            for t in page['tombstones']
+        ]
+        return Response({
+            'changed': self.get_serializer(active, many= True).data,
+            'deleted': deleted,
+            'next_cursor': page['next_cursor'],
+            'has_more': page['has_more'],
+            'cursor_expires_at': page['cursor_expires_at'],
+        })
+
+    @action(detail= False, methods=['get'])
+    def autocomplete(self, request):
+        # GET /products/autocomplete/?q=cam&limit=8 — sugestões da caixa de busca,
+        # servidas do índice de prefixos em memória (sem consulta ao banco)
+        try:
+            limit = int(request.query_params.get('limit', self.AUTOCOMPLETE_DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'detail': 'limit deve ser inteiro.'}, status= 400)
+        limit = max(1, min(limit, self.AUTOCOMPLETE_MAX_LIMIT))
+        return Response({'results': autocomplete.search(request.query_params.get('q', ''), limit)})
+
+    @action(detail= False, methods=['get'], url_path= 'autocomplete/stats')
+    def autocomplete_stats(self, request):
+        # GET /products/autocomplete/stats/ (admin) — tamanho e memória do índice deste worker
+        autocomplete.index.ensure_fresh()
+        return Response(autocomplete.index.stats())
+
+    @action(detail= False, methods=['post'], url_path= 'stock', serializer_class= StockBatchSerializer)
+    def stock(self, request):
+        # POST /products/stock/ (admin) — ajustes de estoque em lote, com SKUs repetidos
+        # consolidados e aplicados num único UPDATE; resultado por SKU
+        serializer = self.get_serializer(data= request.data)
+        serializer.is_valid(raise_exception= True)
+        results = apply_stock_updates(serializer.validated_data['updates'])
+        return Response({
+            'results': results,
+            'updated': sum(1 for r in results if r['status'] == 'updated'),
+        })
@@ -0,0 +1,13 @@
+from django_filters import rest_framework as filters
+
+from .models import Order
+
+
+class OrderFilter(filters.FilterSet):
+    # ?created_after=2025-01-01&created_before=2025-02-01T00:00:00Z&status=PAID
+    created_after = filters.IsoDateTimeFilter(field_name= 'created_at', lookup_expr= 'gte')
+    created_before = filters.IsoDateTimeFilter(field_name= 'created_at', lookup_expr= 'lt')
+
+    class Meta:
+        model = Order
+        fields = ['status', 'created_after', 'created_before']
@@ -0,0 +1,60 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+
+
+class Command(BaseCommand):
+    help = 'Remove carrinhos (status CART) sem atividade há N dias, em lotes curtos para não segurar locks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Idade mínima (dias desde updated_at). Padrão: 30.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Carrinhos por transação. Padrão: 500.')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Pausa (s) entre lotes, para aliviar o banco.')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas conta o que seria removido.')
+
+    def handle(self, *args, **opts):
+        days, batch_size = opts['days'], opts['batch_size']
+        if days < 0 or batch_size <= 0:
+            raise CommandError('--days deve ser >= 0 e --batch-size > 0.')
+
+        cutoff = timezone.now() - timedelta(days= days)
+        stale = Order.objects.filter(status= Order.Status.CART, updated_at__lt= cutoff)
+
+        if opts['dry_run']:
+            carts = stale.count()
+            items = OrderItem.objects.filter(order__in= stale).count()
+            self.stdout.write(f'[dry-run] {carts} carrinho(s) e {items} item(ns) seriam removidos.')
+            return
+
+        started = time.monotonic()
+        carts_deleted = items_deleted = batches = 0
+        while True:
+            ids = list(stale.order_by('id').values_list('id', flat= True)[:batch_size])
+            if not ids:
+                break
+            # cada lote em sua própria transação: locks curtos e progresso incremental
+            with transaction.atomic():
+                # refiltra: um carrinho pode ter sido usado desde a leitura dos ids
+                ids = list(
+                    Order.objects.select_for_update()
+                    .filter(id__in= ids, status= Order.Status.CART, updated_at__lt= cutoff)
+                    .values_list('id', flat= True)
+                )
+                n_items, _ = OrderItem.objects.filter(order_id__in= ids).delete()
+                n_carts, _ = Order.objects.filter(id__in= ids).delete()
+            items_deleted += n_items
+            carts_deleted += n_carts
+            batches += 1
+            if opts['sleep']:
+                time.sleep(opts['sleep'])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{carts_deleted} carrinho(s) e {items_deleted} item(ns) removidos '
+            f'em {batches} lote(s) ({elapsed:.2f}s).'
+        ))
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-19 10:51
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_carts(apps, schema_editor):
+    # Carrinhos duplicados (criados por requisições concorrentes) impediriam a
+    # criação do índice único: mantém o mais recente e funde os itens nele.
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+
+    dup_users = (
+        Order.objects.filter(status='CART')
+        .values('user_id')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+        .values_list('user_id', flat=True)
+    )
+    for user_id in list(dup_users):
+        carts = list(Order.objects.filter(user_id=user_id, status='CART').order_by('-updated_at', '-id'))
+        keep, extras = carts[0], carts[1:]
+        kept_items = {it.product_id: it for it in OrderItem.objects.filter(order=keep)}
+        for it in OrderItem.objects.filter(order__in=extras):
+            if it.product_id in kept_items:
+                target = kept_items[it.product_id]
+                target.quantity += it.quantity
+                target.save(update_fields=['quantity'])
+                it.delete()
+            else:
+                it.order = keep
+                it.save(update_fields=['order'])
+                kept_items[it.product_id] = it
+        Order.objects.filter(id__in=[c.id for c in extras]).delete()
+        keep.total_amount = sum((it.unit_price * it.quantity for it in kept_items.values()), Decimal('0.00'))
+        keep.save(update_fields=['total_amount'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_orderitem_orderitem_quantity_gte_1'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_carts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'CART')), fields=('user',), name='order_unique_cart_per_user'),
+        ),
+    ]
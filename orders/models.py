@@ -1,7 +1,9 @@
 from django.conf import settings
-from django.db import models
+from django.db import connections, models, router
 from decimal import Decimal
-from django.db.models import Q
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 
 class Order(models.Model):
@@ -22,18 +24,37 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
-        indexes = [models.Index(fields= ['status', 'user'])]
+        indexes = [
+            models.Index(fields= ['status', 'user']),
+            # histórico do usuário: filtro por user + intervalo/ordem de created_at
+            models.Index(fields= ['user', 'created_at']),
+        ]
+        constraints = [
+            # no máximo um carrinho aberto por usuário
+            models.UniqueConstraint(fields=['user'], condition=Q(status='CART'), name='order_unique_cart_per_user'),
+        ]
 
     def __str__(self):
         return f'Order #{self.pk} - {self.user} - {self.status}'
 
     def recalc_total(self, save= True):
-        total = Decimal('0.00')
-        for it in self.items.all():
-            total += it.unit_price * it.quantity
-        self.total_amount = total
-        if save:
-            self.save(update_fields= ['total_amount', 'updated_at'])
+        line_total = ExpressionWrapper(
+            F('unit_price') * F('quantity'), output_field= DecimalField(max_digits= 12, decimal_places= 2)
+        )
+        if not save:
+            self.total_amount = self.items.aggregate(t= Sum(line_total))['t'] or Decimal('0.00')
+            return
+        # uma única instrução (UPDATE ... SET total = (SELECT SUM ...)): requisições
+        # concorrentes no mesmo carrinho não sobrescrevem o total com uma soma antiga
+        subtotal = (
+            OrderItem.objects.filter(order= OuterRef('pk'))
+            .values('order').annotate(t= Sum(line_total)).values('t')
+        )
+        Order.objects.filter(pk= self.pk).update(
+            total_amount= Coalesce(Subquery(subtotal), Value(Decimal('0.00'))),
+            updated_at= timezone.now(),
+        )
+        self.refresh_from_db(fields= ['total_amount', 'updated_at'])
 
 
 class OrderItem(models.Model):
@@ -55,3 +76,26 @@ class OrderItem(models.Model):
     @property
     def line_total(self):
         return self.unit_price * self.quantity
+
+    @classmethod
+    def upsert(cls, order_id, product_id, quantity, unit_price, increment= True):
+        """
+        Insere o item ou, se o produto já está no pedido, soma (increment=True) ou
+        substitui a quantidade — numa única instrução INSERT ... ON CONFLICT
+        (Postgres e SQLite >= 3.24), sem corrida entre leitura e escrita.
+        O preço de um item já existente é mantido.
+        """
+        connection = connections[router.db_for_write(cls)]
+        qn = connection.ops.quote_name
+        opts = cls._meta
+        table = qn(opts.db_table)
+        order_col, product_col, qty_col, price_col = (
+            qn(opts.get_field(name).column) for name in ('order', 'product', 'quantity', 'unit_price')
+        )
+        new_qty = f'{table}.{qty_col} + excluded.{qty_col}' if increment else f'excluded.{qty_col}'
+        sql = (
+            f'INSERT INTO {table} ({order_col}, {product_col}, {qty_col}, {price_col}) VALUES (%s, %s, %s, %s) '
+            f'ON CONFLICT ({order_col}, {product_col}) DO UPDATE SET {qty_col} = {new_qty}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [order_id, product_id, quantity, unit_price])
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from app.fieldsets import SparseFieldsetSerializerMixin
 from .models import Order, OrderItem
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -15,7 +16,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
     def get_line_total(obj):
         return obj.unit_price * obj.quantity
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many= True, read_only= True)
 
     class Meta:
@@ -26,3 +27,21 @@ class OrderSerializer(serializers.ModelSerializer):
 class AdminOrderSerializer(OrderSerializer):
     class Meta(OrderSerializer.Meta):
         read_only_fields = ['id', 'total_amount', 'created_at', 'updated_at', 'items']
+
+
+class OrderSummarySerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    # item_count/total_quantity vêm do annotate() em OrderViewSet.get_queryset
+    item_count = serializers.IntegerField(read_only= True)
+    total_quantity = serializers.IntegerField(read_only= True)
+
+    class Meta:
+        model = Order
+        fields = ['id', 'status', 'total_amount', 'item_count', 'total_quantity', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+class OrderSummaryWithItemsSerializer(OrderSummarySerializer):
+    items = OrderItemSerializer(many= True, read_only= True)
+
+    class Meta(OrderSummarySerializer.Meta):
+        fields = OrderSummarySerializer.Meta.fields + ['items']
+        read_only_fields = fields
@@ -1,18 +1,42 @@
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Prefetch, Sum
+from django.db.models.functions import Coalesce
+from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
 
 from .models import Order, OrderItem
-from .serializers import OrderSerializer, AdminOrderSerializer
+from .filters import OrderFilter
+from .serializers import (
+    AdminOrderSerializer,
+    OrderSerializer,
+    OrderSummarySerializer,
+    OrderSummaryWithItemsSerializer,
+)
 from .permissions import IsOwnerOrAdmin
+from app.fieldsets import SparseFieldsetMixin
 from catalog.models import Product
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = OrderFilter
+    ordering_fields = ['created_at', 'total_amount']
+    fieldset_columns = {
+        'id': (), 'status': ('status',), 'total_amount': ('total_amount',),
+        'shipping_address': ('shipping_address',), 'created_at': ('created_at',),
+        'updated_at': ('updated_at',), 'items': (), 'item_count': (), 'total_quantity': (),
+    }
+    # user_id é lido por IsOwnerOrAdmin.has_object_permission
+    fieldset_base_columns = ('user',)
+    fieldset_prefetch_related = {
+        'items': Prefetch('items', queryset= OrderItem.objects.select_related('product')),
+    }
 
     def get_permissions(self):
         # Admin pode alterar/destruir; demais ações exigem usuário autenticado e dono
@@ -21,7 +45,14 @@ class OrderViewSet(viewsets.ModelViewSet):
         return [IsOwnerOrAdmin()]
 
     def get_queryset(self):
-        qs = super().get_queryset()
+        qs = self.narrow_queryset(super().get_queryset())
+        if self.action == 'list':
+            # resumo do histórico: contagens calculadas no banco, sem carregar itens
+            # (o GROUP BY ignora o Meta.ordering, por isso o order_by explícito)
+            qs = qs.annotate(
+                item_count= Count('items'),
+                total_quantity= Coalesce(Sum('items__quantity'), 0),
+            ).order_by('-created_at', '-id')
         if self.request.user.is_staff:
             return qs
         return qs.filter(user= self.request.user)
@@ -29,13 +60,26 @@ class OrderViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.request.user.is_staff and self.action in ['update', 'partial_update']:
             return AdminOrderSerializer
+        if self.action == 'list':
+            # ?expand=items inclui os itens no histórico; por padrão só o resumo
+            if 'items' in self.request.query_params.get('expand', '').split(','):
+                return OrderSummaryWithItemsSerializer
+            return OrderSummarySerializer
         return OrderSerializer
 
     # ===== Carrinho =====
     @staticmethod
     def _get_or_create_cart(user):
-        cart, _ = Order.objects.get_or_create(user= user, status= Order.Status.CART)
-        return cart
+        cart = Order.objects.filter(user= user, status= Order.Status.CART).first()
+        if cart is not None:
+            return cart
+        try:
+            # savepoint: se outra requisição criar o carrinho primeiro, o índice
+            # único parcial (order_unique_cart_per_user) rejeita este INSERT
+            with transaction.atomic():
+                return Order.objects.create(user= user, status= Order.Status.CART)
+        except IntegrityError:
+            return Order.objects.get(user= user, status= Order.Status.CART)
 
     @action(detail=False, methods=['get'], url_path= 'me/cart')
     def my_cart(self, request):
@@ -52,12 +96,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         cart = self._get_or_create_cart(request.user)
         product = get_object_or_404(Product, pk= product_id, is_active= True)
 
-        item, created = OrderItem.objects.get_or_create(
-            order=cart, product=product, defaults={'quantity': qty, 'unit_price': product.price}
-        )
-        if not created:
-            item.quantity += qty
-            item.save(update_fields=['quantity'])
+        OrderItem.upsert(cart.pk, product.pk, qty, product.price)
 
         cart.recalc_total()
         return Response(OrderSerializer(cart).data, status= status.HTTP_200_OK)
@@ -70,20 +109,15 @@ class OrderViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'product_id é obrigatório.'}, status= 400)
 
         cart = self._get_or_create_cart(request.user)
-        item = OrderItem.objects.filter(order= cart, product_id= product_id).first()
 
         if qty <= 0:
-            if item:
-                item.delete()
+            deleted, _ = OrderItem.objects.filter(order= cart, product_id= product_id).delete()
+            if deleted:
                 cart.recalc_total()
             return Response(OrderSerializer(cart).data)
 
         product = get_object_or_404(Product, pk= product_id, is_active= True)
-        if item:
-            item.quantity = qty
-            item.save(update_fields=['quantity'])
-        else:
-            OrderItem.objects.create(order= cart, product= product, quantity= qty, unit_price= product.price)
+        OrderItem.upsert(cart.pk, product.pk, qty, product.price, increment= False)
 
         cart.recalc_total()
         return Response(OrderSerializer(cart).data)
@@ -124,7 +158,9 @@ class OrderViewSet(viewsets.ModelViewSet):
             for item in cart.items.all():
                 prod = products[item.product_id]
                 prod.stock -= item.quantity
-                prod.save(update_fields=['stock'])
+                # updated_at explícito: auto_now só o grava se estiver em update_fields,
+                # e sem ele a baixa de estoque não aparece no /products/changes/
+                prod.save(update_fields=['stock', 'updated_at'])
 
             cart.shipping_address = address
             cart.status = Order.Status.PENDING
@@ -1,9 +1,15 @@
 import pytest
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 from catalog.models import Category, Product
 
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    # listagens e produtos ficam em cache (LocMem) entre testes
+    cache.clear()
+
 @pytest.fixture
 def api_client():
     return APIClient()
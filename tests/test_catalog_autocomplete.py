@@ -0,0 +1,128 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from catalog import autocomplete
+from catalog.autocomplete import PrefixIndex, normalize
+from catalog.models import Product
+
+URL = "/api/catalog/products/autocomplete/"
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    # o índice é global por processo; cada teste começa do zero
+    monkeypatch.setattr(autocomplete, "index", PrefixIndex())
+
+
+def _create(category, sku, name, **extra):
+    return Product.objects.create(sku=sku, name=name, price="1.00", stock=1, category=category, **extra)
+
+
+def _skus(resp):
+    return [r["sku"] for r in resp.data["results"]]
+
+
+def test_normalize():
+    assert normalize("  Café   Moído ") == "cafe moido"
+    assert normalize("SKU-Ä1") == "sku-a1"
+
+
+@pytest.mark.django_db
+def test_autocomplete_matches_name_words_and_sku(api_client, category):
+    _create(category, "CAM-1", "Camiseta Azul")
+    _create(category, "CAN-1", "Caneca térmica")
+    _create(category, "BON-1", "Boné azul marinho")
+    _create(category, "OFF-1", "Camisa social", is_active=False)
+
+    resp = api_client.get(URL, {"q": "ca"})
+    assert resp.status_code == 200
+    assert _skus(resp) == ["CAM-1", "CAN-1"]
+    assert resp.data["results"][0] == {"id": resp.data["results"][0]["id"], "name": "Camiseta Azul", "sku": "CAM-1"}
+
+    assert sorted(_skus(api_client.get(URL, {"q": "AZUL"}))) == ["BON-1", "CAM-1"]
+    assert _skus(api_client.get(URL, {"q": "azul m"})) == ["BON-1"]
+    assert _skus(api_client.get(URL, {"q": "termica"})) == ["CAN-1"]
+    assert _skus(api_client.get(URL, {"q": "bon-"})) == ["BON-1"]
+    assert _skus(api_client.get(URL, {"q": "social"})) == []
+    assert _skus(api_client.get(URL, {"q": ""})) == []
+
+
+@pytest.mark.django_db
+def test_autocomplete_hard_limit_and_no_queries_when_warm(api_client, category):
+    Product.objects.bulk_create([
+        Product(sku=f"P{i:02}", slug=f"p{i}", name=f"Produto {i}", price="1.00", stock=1, category=category)
+        for i in range(30)
+    ])
+    assert len(api_client.get(URL, {"q": "produto"}).data["results"]) == 8
+    assert len(api_client.get(URL, {"q": "produto", "limit": 1000}).data["results"]) == 20
+    assert api_client.get(URL, {"q": "p", "limit": "x"}).status_code == 400
+
+    with CaptureQueriesContext(connection) as ctx:
+        api_client.get(URL, {"q": "prod"})
+    assert len(ctx.captured_queries) == 0
+
+
+@pytest.mark.django_db
+def test_autocomplete_refreshes_incrementally_on_product_changes(
+    api_client, category, django_capture_on_commit_callbacks
+):
+    keep = _create(category, "K-1", "Teclado mecânico")
+    gone = _create(category, "G-1", "Teclado sem fio")
+    assert _skus(api_client.get(URL, {"q": "teclado"})) == ["K-1", "G-1"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        keep.name = "Mouse gamer"
+        keep.save()
+        gone.delete()
+        _create(category, "N-1", "Teclado compacto")
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert _skus(api_client.get(URL, {"q": "teclado"})) == ["N-1"]
+    # só o delta (produtos alterados + tombstones), sem recarregar o catálogo
+    assert len(ctx.captured_queries) == 2
+    assert _skus(api_client.get(URL, {"q": "mouse"})) == ["K-1"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        keep.is_active = False
+        keep.save()
+    assert _skus(api_client.get(URL, {"q": "mouse"})) == []
+
+
+@pytest.mark.django_db
+def test_autocomplete_stats_admin_only(api_client, admin_client, category):
+    _create(category, "S-1", "Fone de ouvido")
+    assert api_client.get(URL + "stats/").status_code in (401, 403)
+
+    resp = admin_client.get(URL + "stats/")
+    assert resp.status_code == 200
+    assert resp.data["products"] == 1
+    assert resp.data["entries"] == 4  # sku + "fone de ouvido", "de ouvido", "ouvido"
+    assert resp.data["memory_bytes"] > 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("inplace_max", [50, 0])  # bisect numa cópia / merge
+def test_autocomplete_sync_skips_unchanged_rows_and_swaps_snapshot(
+    monkeypatch, api_client, category, django_capture_on_commit_callbacks, inplace_max
+):
+    monkeypatch.setattr(autocomplete, "INPLACE_MAX_CHANGES", inplace_max)
+    products = [_create(category, f"T-{i}", f"Teclado {i}") for i in range(6)]
+    assert len(api_client.get(URL, {"q": "teclado"}).data["results"]) == 6
+    published = autocomplete.index.entries
+    snapshot = list(published)
+
+    # só estoque mudou (como no checkout e no /products/stock/): nada a reindexar
+    with django_capture_on_commit_callbacks(execute=True):
+        products[0].stock = 5
+        products[0].save()
+    api_client.get(URL, {"q": "teclado"})
+    assert autocomplete.index.entries is published
+
+    with django_capture_on_commit_callbacks(execute=True):
+        products[1].name = "Mouse"
+        products[1].save()
+    assert _skus(api_client.get(URL, {"q": "mouse"})) == ["T-1"]
+    # a lista publicada antes não é alterada (buscas em andamento seguem lendo-a)
+    assert published == snapshot
+    assert autocomplete.index.entries == sorted(autocomplete.index.entries)
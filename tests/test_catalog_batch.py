@@ -0,0 +1,75 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from catalog.models import Product
+
+URL = "/api/catalog/products/batch/"
+
+
+@pytest.fixture
+def products(category):
+    return [
+        Product.objects.create(sku=f"B{i}", name=f"Prod {i}", price="10.00", stock=1, category=category)
+        for i in range(3)
+    ]
+
+
+@pytest.mark.django_db
+def test_batch_by_ids_keeps_order_and_reports_missing(api_client, products):
+    p0, p1, p2 = products
+    p1.is_active = False
+    p1.save()
+
+    ids = f"{p2.id},{p0.id},{p1.id},999999"
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(f"{URL}?ids={ids}")
+    assert resp.status_code == 200
+    assert [r["id"] for r in resp.data["results"]] == [p2.id, p0.id]
+    assert resp.data["missing"] == [p1.id, 999999]
+    assert len(ctx.captured_queries) == 1
+
+    # a segunda chamada é servida pelo cache por item
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(f"{URL}?ids={p0.id},{p2.id}")
+    assert [r["id"] for r in resp.data["results"]] == [p0.id, p2.id]
+    assert ctx.captured_queries == []
+
+
+@pytest.mark.django_db
+def test_batch_by_skus_and_invalidation(api_client, products):
+    resp = api_client.get(f"{URL}?skus=B1,B0")
+    assert [r["sku"] for r in resp.data["results"]] == ["B1", "B0"]
+
+    products[1].name = "Renomeado"
+    products[1].save()
+    resp = api_client.get(f"{URL}?skus=B1")
+    assert resp.data["results"][0]["name"] == "Renomeado"
+
+    products[0].category.name = "Outra"
+    products[0].category.save()
+    resp = api_client.get(f"{URL}?skus=B0")
+    assert resp.data["results"][0]["category_name"] == "Outra"
+
+    # troca de SKU: o SKU antigo deixa de resolver (instância recarregada do banco e a do create)
+    product = Product.objects.get(sku="B2")
+    assert api_client.get(f"{URL}?skus=B2").data["results"][0]["id"] == product.id
+    product.sku = "B2-NOVO"
+    product.save()
+    resp = api_client.get(f"{URL}?skus=B2,B2-NOVO")
+    assert resp.data["missing"] == ["B2"]
+    assert [r["sku"] for r in resp.data["results"]] == ["B2-NOVO"]
+
+    assert api_client.get(f"{URL}?skus=B0").data["results"]
+    products[0].sku = "B0-NOVO"
+    products[0].save()
+    assert api_client.get(f"{URL}?skus=B0").data["missing"] == ["B0"]
+
+
+@pytest.mark.django_db
+def test_batch_validation(api_client, products):
+    assert api_client.get(URL).status_code == 400
+    assert api_client.get(f"{URL}?ids=1&skus=B0").status_code == 400
+    assert api_client.get(f"{URL}?ids=1,abc").status_code == 400
+    too_many = ",".join(str(i) for i in range(1, 102))
+    assert api_client.get(f"{URL}?ids={too_many}").status_code == 400
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from catalog import changes
+from catalog.models import Product, ProductTombstone
+
+URL = "/api/catalog/products/changes/"
+
+
+@pytest.fixture(autouse=True)
+def _no_safety_lag(settings):
+    settings.CATALOG_CHANGES_SAFETY_LAG = 0
+
+
+def _create(category, sku, **extra):
+    return Product.objects.create(sku=sku, name=sku, price="1.00", stock=1, category=category, **extra)
+
+
+@pytest.mark.django_db
+def test_changes_feed_delta_sync(api_client, category):
+    a = _create(category, "A")
+    b = _create(category, "B")
+    _create(category, "C", is_active=False)
+
+    resp = api_client.get(URL)
+    assert resp.status_code == 200
+    assert [p["sku"] for p in resp.data["changed"]] == ["A", "B"]
+    assert [(d["sku"], d["reason"]) for d in resp.data["deleted"]] == [("C", "inactive")]
+    assert resp.data["has_more"] is False
+    cursor = resp.data["next_cursor"]
+
+    # nada mudou: o mesmo cursor não devolve nada
+    resp = api_client.get(URL, {"cursor": cursor})
+    assert resp.data["changed"] == [] and resp.data["deleted"] == []
+
+    a.price = "2.00"
+    a.save()
+    b_id = b.id
+    b.delete()
+
+    resp = api_client.get(URL, {"cursor": cursor})
+    assert [p["sku"] for p in resp.data["changed"]] == ["A"]
+    assert resp.data["deleted"][0]["id"] == b_id
+    assert resp.data["deleted"][0]["reason"] == "deleted"
+
+
+@pytest.mark.django_db
+def test_changes_feed_includes_checkout_stock(api_client, auth_client, product):
+    cursor = api_client.get(URL).data["next_cursor"]
+
+    auth_client.post("/api/orders/me/cart/add-item", {"product_id": product.id, "quantity": 2}, format="json")
+    resp = auth_client.post("/api/orders/me/cart/checkout", {"shipping_address": "Rua X, 123"}, format="json")
+    assert resp.status_code == 200
+
+    resp = api_client.get(URL, {"cursor": cursor})
+    assert [(p["sku"], p["stock"]) for p in resp.data["changed"]] == [("SKU-1", 8)]
+
+
+@pytest.mark.django_db
+def test_changes_feed_includes_category_rename(api_client, product, category):
+    cursor = api_client.get(URL).data["next_cursor"]
+
+    category.name = "Áudio"
+    category.save()
+
+    resp = api_client.get(URL, {"cursor": cursor})
+    assert [(p["sku"], p["category_name"]) for p in resp.data["changed"]] == [("SKU-1", "Áudio")]
+
+
+@pytest.mark.django_db
+def test_changes_feed_pagination(api_client, category):
+    for sku in ("A", "B", "C"):
+        _create(category, sku)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = api_client.get(URL, params)
+        seen += [p["sku"] for p in resp.data["changed"]]
+        cursor = resp.data["next_cursor"]
+        if not resp.data["has_more"]:
+            break
+    assert seen == ["A", "B", "C"]
+
+
+@pytest.mark.django_db
+def test_changes_feed_cursor_errors(api_client, settings):
+    assert api_client.get(URL, {"cursor": "lixo"}).status_code == 400
+
+    old = timezone.now() - timedelta(days=settings.CATALOG_TOMBSTONE_RETENTION_DAYS + 1)
+    cursor = changes.encode_cursor((old, 0), (old, 0))
+    resp = api_client.get(URL, {"cursor": cursor})
+    assert resp.status_code == 410
+    assert resp.data["code"] == "cursor_expired"
+
+
+@pytest.mark.django_db
+def test_purge_product_tombstones(settings):
+    ProductTombstone.objects.create(product_id=1, sku="OLD")
+    ProductTombstone.objects.filter(sku="OLD").update(
+        deleted_at=timezone.now() - timedelta(days=settings.CATALOG_TOMBSTONE_RETENTION_DAYS + 1)
+    )
+    ProductTombstone.objects.create(product_id=2, sku="NEW")
+    call_command("purge_product_tombstones")
+    assert list(ProductTombstone.objects.values_list("sku", flat=True)) == ["NEW"]
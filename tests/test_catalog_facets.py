@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from app.settings import env_decimal_list
+from catalog.models import Category, Product
+
+URL = "/api/catalog/products/"
+
+
+@pytest.fixture(autouse=True)
+def _price_buckets(settings):
+    settings.CATALOG_PRICE_BUCKETS = [Decimal("50"), Decimal("100")]
+
+
+@pytest.fixture
+def catalog(category):
+    books = Category.objects.create(name="Livros", slug="livros")
+    rows = [("E1", "10.00", category), ("E2", "75.00", category), ("E3", "300.00", category),
+            ("L1", "20.00", books), ("L2", "30.00", books, False)]
+    for sku, price, cat, *active in rows:
+        Product.objects.create(sku=sku, name=sku, price=price, stock=1, category=cat,
+                               is_active=active[0] if active else True)
+    return category, books
+
+
+@pytest.mark.django_db
+def test_facets_counts_in_one_query(api_client, catalog):
+    electronics, books = catalog
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(URL, {"facets": "category,price"})
+    assert resp.status_code == 200
+    assert len(ctx.captured_queries) == 3  # COUNT + página + facets
+
+    facets = resp.data["facets"]
+    assert facets["category"] == [
+        {"id": electronics.id, "name": "Eletrônicos", "count": 3},
+        {"id": books.id, "name": "Livros", "count": 1},
+    ]
+    assert facets["price"] == [
+        {"min": None, "max": "50.00", "count": 2},
+        {"min": "50.00", "max": "100.00", "count": 1},
+        {"min": "100.00", "max": None, "count": 1},
+    ]
+
+
+@pytest.mark.django_db
+def test_facets_follow_filters_and_are_cached(api_client, catalog):
+    _, books = catalog
+    resp = api_client.get(URL, {"facets": "price", "category": books.id})
+    assert "category" not in resp.data["facets"]
+    assert [b["count"] for b in resp.data["facets"]["price"]] == [1, 0, 0]
+
+    with CaptureQueriesContext(connection) as ctx:
+        cached = api_client.get(URL, {"facets": "price", "category": books.id})
+    assert ctx.captured_queries == []
+    assert cached.json()["facets"]["price"][0]["count"] == 1
+
+
+@pytest.mark.django_db
+def test_invalid_facet(api_client, catalog):
+    resp = api_client.get(URL, {"facets": "color"})
+    assert resp.status_code == 400
+    assert "color" in resp.data["facets"]
+
+
+def test_price_buckets_setting_is_validated(monkeypatch):
+    monkeypatch.setenv("CATALOG_PRICE_BUCKETS", " 50, 100.5 ")
+    assert env_decimal_list("CATALOG_PRICE_BUCKETS") == [Decimal("50"), Decimal("100.5")]
+    for raw in ("50,abc", "100,50", "50,50", "50,inf"):
+        monkeypatch.setenv("CATALOG_PRICE_BUCKETS", raw)
+        with pytest.raises(ImproperlyConfigured):
+            env_decimal_list("CATALOG_PRICE_BUCKETS")
@@ -0,0 +1,81 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from app import response_cache
+from catalog.cache import PRODUCT_LIST_CACHE
+from catalog.models import Product
+from catalog.stock import MAX_STOCK
+
+URL = "/api/catalog/products/stock/"
+
+
+@pytest.fixture
+def stock_products(category):
+    return {
+        sku: Product.objects.create(sku=sku, name=sku, price="1.00", stock=stock, category=category)
+        for sku, stock in (("A", 10), ("B", 2), ("C", 0))
+    }
+
+
+@pytest.mark.django_db
+def test_stock_batch_coalesces_and_applies_in_one_update(admin_client, stock_products, django_capture_on_commit_callbacks):
+    payload = {"updates": [
+        {"sku": "A", "delta": -3},
+        {"sku": "B", "delta": -5},      # ficaria negativo: rejeitado
+        {"sku": "A", "delta": -2},
+        {"sku": "C", "absolute": 7},
+        {"sku": "C", "delta": 1},
+        {"sku": "ZZZ", "delta": 1},
+    ]}
+    generation = response_cache.current_generation(PRODUCT_LIST_CACHE)
+    with CaptureQueriesContext(connection) as ctx, django_capture_on_commit_callbacks(execute=True):
+        resp = admin_client.post(URL, payload, format="json")
+    assert resp.status_code == 200
+
+    results = {r["sku"]: r for r in resp.data["results"]}
+    assert [r["sku"] for r in resp.data["results"]] == ["A", "B", "C", "ZZZ"]
+    assert results["A"] == {"sku": "A", "status": "updated", "stock": 5, "previous": 10, "ops": 2}
+    assert results["B"]["status"] == "rejected"
+    assert results["B"]["stock"] == 2
+    assert results["C"]["stock"] == 8
+    assert results["ZZZ"]["status"] == "not_found"
+    assert resp.data["updated"] == 2
+
+    updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "catalog_product"')]
+    assert len(updates) == 1
+    # invalidação da listagem uma única vez por lote
+    assert response_cache.current_generation(PRODUCT_LIST_CACHE) == generation + 1
+
+    stocks = dict(Product.objects.values_list("sku", "stock"))
+    assert stocks == {"A": 5, "B": 2, "C": 8}
+
+
+@pytest.mark.django_db
+def test_stock_batch_updates_change_feed_timestamp(admin_client, stock_products):
+    before = stock_products["A"].updated_at
+    admin_client.post(URL, {"updates": [{"sku": "A", "absolute": 1}]}, format="json")
+    stock_products["A"].refresh_from_db()
+    assert stock_products["A"].updated_at > before
+
+
+@pytest.mark.django_db
+def test_stock_batch_validation_and_permissions(auth_client, admin_client, stock_products):
+    assert auth_client.post(URL, {"updates": [{"sku": "A", "delta": 1}]}, format="json").status_code == 403
+    assert admin_client.post(URL, {"updates": []}, format="json").status_code == 400
+    assert admin_client.post(URL, {"updates": [{"sku": "A"}]}, format="json").status_code == 400
+    assert admin_client.post(URL, {"updates": [{"sku": "A", "delta": 1, "absolute": 2}]}, format="json").status_code == 400
+    assert admin_client.post(URL, {"updates": [{"sku": "A", "absolute": -1}]}, format="json").status_code == 400
+    assert admin_client.post(URL, {"updates": [{"sku": "A", "delta": 10**15}]}, format="json").status_code == 400
+    assert admin_client.post(URL, {"updates": [{"sku": "A", "absolute": MAX_STOCK + 1}]}, format="json").status_code == 400
+
+
+@pytest.mark.django_db
+def test_stock_batch_rejects_targets_out_of_range(admin_client, stock_products):
+    # cada delta é válido, mas a soma passa do limite da coluna: só esse SKU é rejeitado
+    updates = [{"sku": "A", "delta": MAX_STOCK}, {"sku": "A", "delta": 1}, {"sku": "B", "delta": 1}]
+    resp = admin_client.post(URL, {"updates": updates}, format="json")
+    assert resp.status_code == 200
+    assert [(r["sku"], r["status"]) for r in resp.data["results"]] == [("A", "rejected"), ("B", "updated")]
+    stock_products["A"].refresh_from_db()
+    assert stock_products["A"].stock == 10
@@ -0,0 +1,64 @@
+import json
+import logging
+from io import StringIO
+
+import pytest
+
+from app.logs import QueueStreamHandler
+
+
+def test_queue_stream_handler_writes_json_and_flushes_on_close():
+    stream = StringIO()
+    handler = QueueStreamHandler(stream=stream)
+    logger = logging.getLogger("tests.queue_handler")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning("pedido %s", 42, extra={"route": "order-detail", "duration_ms": 1.5})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("falhou")
+    finally:
+        logger.removeHandler(handler)
+        handler.close()  # esvazia a fila antes de parar a thread
+
+    first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert first["message"] == "pedido 42"
+    assert first["level"] == "WARNING"
+    assert first["route"] == "order-detail"
+    assert first["duration_ms"] == 1.5
+    assert second["message"] == "falhou"
+    assert "ValueError: boom" in second["exc_info"]
+    assert second["exc_info"].startswith("Traceback")
+
+
+def test_queue_stream_handler_drops_when_full():
+    handler = QueueStreamHandler(stream=StringIO(), maxsize=1)
+    handler.listener.stop()  # ninguém consome: a fila enche
+    record = logging.makeLogRecord({"msg": "x"})
+    handler.handle(record)
+    handler.handle(record)
+    assert handler.dropped == 1
+    handler.listener = None
+    handler.close()
+
+
+@pytest.mark.django_db
+def test_access_log_samples_success_and_always_logs_errors(settings, caplog, api_client, product):
+    settings.ACCESS_LOG_SAMPLE_RATE = 1.0
+    settings.ACCESS_LOG_HOT_ROUTES = {"product-list": 0.0}
+    caplog.set_level(logging.INFO, logger="app.access")
+
+    api_client.get("/api/catalog/products/")
+    api_client.get(f"/api/catalog/products/{product.id}/")
+    api_client.get("/api/catalog/products/", {"fields": "nope"})
+
+    records = [r for r in caplog.records if r.name == "app.access"]
+    assert [(r.route, r.status) for r in records] == [("product-detail", 200), ("product-list", 400)]
+    detail, error = records
+    assert detail.levelno == logging.INFO
+    assert detail.queries == 1
+    assert error.levelno == logging.WARNING
+    assert error.queries == 0
+    assert error.sample_rate == 1.0
@@ -0,0 +1,92 @@
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from app import schema
+
+URL = "/api/schema/"
+
+
+@pytest.fixture(autouse=True)
+def schema_dir(settings, tmp_path, monkeypatch):
+    settings.OPENAPI_SCHEMA_CACHE_DIR = str(tmp_path / "openapi")
+    settings.APP_CODE_VERSION = "v1"
+    monkeypatch.setattr(schema, "_loaded", None)
+    return tmp_path / "openapi"
+
+
+@pytest.fixture
+def render_calls(monkeypatch):
+    calls = []
+    original = schema.render_schema
+
+    def counting():
+        calls.append(1)
+        return original()
+
+    monkeypatch.setattr(schema, "render_schema", counting)
+    return calls
+
+
+def test_schema_is_generated_once_and_served_with_etag(api_client, render_calls):
+    first = api_client.get(URL)
+    assert first.status_code == 200
+    assert first["Content-Type"].startswith("application/vnd.oai.openapi")
+    assert b"/api/catalog/products/" in first.content
+    etag = first["ETag"]
+
+    second = api_client.get(URL)
+    assert second["ETag"] == etag
+    assert len(render_calls) == 1
+
+    not_modified = api_client.get(URL, HTTP_IF_NONE_MATCH=etag)
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+
+def test_schema_json_and_compressed_variants(api_client):
+    identity = api_client.get(URL, {"format": "json"})
+    doc = json.loads(identity.content)
+    assert "/api/orders/me/cart" in doc["paths"]
+
+    compressed = api_client.get(URL, {"format": "json"}, HTTP_ACCEPT_ENCODING="gzip")
+    assert compressed["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.content) == identity.content
+    assert compressed["ETag"] == identity["ETag"]
+    assert "Accept-Encoding" in compressed["Vary"]
+
+
+def test_schema_file_is_reused_until_code_version_changes(settings, schema_dir, render_calls):
+    assert schema.build() is True
+    assert (schema_dir / "openapi.yaml").exists()
+
+    # outro processo (mesma versão) só lê o arquivo
+    schema._loaded = None
+    assert schema.build() is False
+    assert schema.get_schema()["version"] == "v1"
+    assert len(render_calls) == 1
+
+    settings.APP_CODE_VERSION = "v2"
+    assert schema.get_schema()["version"] == "v2"
+    assert len(render_calls) == 2
+    assert json.loads((schema_dir / "openapi.meta.json").read_text())["version"] == "v2"
+
+
+def test_build_openapi_schema_command(schema_dir):
+    out = StringIO()
+    call_command("build_openapi_schema", stdout=out)
+    assert "(gerado)" in out.getvalue()
+    assert (schema_dir / "openapi.json").exists()
+
+    out = StringIO()
+    call_command("build_openapi_schema", stdout=out)
+    assert "já atualizado" in out.getvalue()
+
+
+def test_docs_point_at_cached_schema(api_client):
+    response = api_client.get("/api/docs/")
+    assert response.status_code == 200
+    assert URL in response.content.decode()
@@ -1,8 +1,18 @@
+import threading
+
 import pytest
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
 from catalog.models import Product
+from orders.models import Order, OrderItem
+from orders.views import OrderViewSet
 
 BASE = "/api"
 
+
 @pytest.mark.django_db
 def test_add_set_remove_cart(auth_client, product):
     # add
@@ -21,6 +31,7 @@ def test_add_set_remove_cart(auth_client, product):
     assert resp.status_code == 200
     assert len(resp.data["cart"]["items"]) == 0
 
+
 @pytest.mark.django_db
 def test_checkout_happy_path(auth_client, product):
     auth_client.post(f"{BASE}/orders/me/cart/add-item", {"product_id": product.id, "quantity": 2}, format="json")
@@ -31,6 +42,7 @@ def test_checkout_happy_path(auth_client, product):
     product.refresh_from_db()
     assert product.stock == 8  # 10 - 2
 
+
 @pytest.mark.django_db
 def test_checkout_insufficient_stock(auth_client, product):
     product.stock = 1
@@ -39,3 +51,59 @@ def test_checkout_insufficient_stock(auth_client, product):
     resp = auth_client.post(f"{BASE}/orders/me/cart/checkout", {"shipping_address": "Rua X, 123"}, format="json")
     assert resp.status_code == 400
     assert "Estoque insuficiente" in resp.data["detail"]
+
+
+@pytest.mark.django_db
+def test_only_one_open_cart_per_user(user):
+    cart = OrderViewSet._get_or_create_cart(user)
+    assert OrderViewSet._get_or_create_cart(user).pk == cart.pk
+
+    with pytest.raises(IntegrityError), transaction.atomic():
+        Order.objects.create(user=user, status=Order.Status.CART)
+
+    # pedidos fora do status CART não entram na restrição
+    Order.objects.create(user=user, status=Order.Status.PENDING)
+    Order.objects.create(user=user, status=Order.Status.PENDING)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_add_item_is_atomic(user, product):
+    cart = OrderViewSet._get_or_create_cart(user)
+    token = str(RefreshToken.for_user(user).access_token)
+    workers, per_worker = 4, 5
+    barrier = threading.Barrier(workers)
+    statuses = []
+
+    def add():
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        barrier.wait()
+        try:
+            for _ in range(per_worker):
+                resp = client.post(f"{BASE}/orders/me/cart/add-item", {"product_id": product.id, "quantity": 1}, format="json")
+                statuses.append(resp.status_code)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=add) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert statuses == [200] * workers * per_worker
+    item = OrderItem.objects.get(order=cart, product=product)
+    assert item.quantity == workers * per_worker
+    cart = Order.objects.get(pk=cart.pk)
+    assert cart.total_amount == item.unit_price * workers * per_worker
+
+
+@pytest.mark.django_db
+def test_add_item_upsert_is_single_statement(auth_client, product):
+    auth_client.post(f"{BASE}/orders/me/cart/add-item", {"product_id": product.id, "quantity": 1}, format="json")
+    with CaptureQueriesContext(connection) as ctx:
+        resp = auth_client.post(f"{BASE}/orders/me/cart/add-item", {"product_id": product.id, "quantity": 2}, format="json")
+    assert resp.data["items"][0]["quantity"] == 3
+    writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith(('INSERT INTO "orders_orderitem"', 'UPDATE "orders_orderitem"'))]
+    assert len(writes) == 1
+    assert "ON CONFLICT" in writes[0]
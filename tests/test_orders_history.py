@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from catalog.models import Product
+from orders.models import Order, OrderItem
+
+URL = "/api/orders"
+
+
+@pytest.fixture
+def history(user, product, category):
+    other = Product.objects.create(sku="SKU-2", name="Mouse", price="50.00", stock=5, category=category)
+    now = timezone.now()
+    orders = []
+    for days, status in ((40, "PAID"), (10, "SHIPPED"), (1, "PENDING")):
+        order = Order.objects.create(user=user, status=status)
+        OrderItem.objects.create(order=order, product=product, quantity=2, unit_price=product.price)
+        OrderItem.objects.create(order=order, product=other, quantity=1, unit_price=other.price)
+        Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(days=days))
+        orders.append(order)
+    return orders
+
+
+@pytest.mark.django_db
+def test_list_returns_annotated_summaries(auth_client, history):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = auth_client.get(URL)
+    assert resp.status_code == 200
+    assert len(ctx.captured_queries) == 3  # usuário (JWT) + COUNT + página
+    first = resp.data["results"][0]
+    assert "items" not in first
+    assert first["item_count"] == 2
+    assert first["total_quantity"] == 3
+
+    resp = auth_client.get(f"{URL}/{history[0].id}")
+    assert len(resp.data["items"]) == 2
+
+
+@pytest.mark.django_db
+def test_list_expand_items(auth_client, history):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = auth_client.get(URL, {"expand": "items"})
+    assert len(ctx.captured_queries) == 4  # + prefetch dos itens
+    assert all(len(o["items"]) == 2 for o in resp.data["results"])
+
+
+@pytest.mark.django_db
+def test_list_filters(auth_client, history):
+    since = (timezone.now() - timedelta(days=20)).date().isoformat()
+    resp = auth_client.get(URL, {"created_after": since})
+    assert [o["status"] for o in resp.data["results"]] == ["PENDING", "SHIPPED"]
+
+    resp = auth_client.get(URL, {"status": "PAID"})
+    assert [o["id"] for o in resp.data["results"]] == [history[0].id]
+
+    assert auth_client.get(URL, {"created_before": "ontem"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_list_ordering(auth_client, history):
+    for order, total in zip(history, ("30.00", "10.00", "20.00")):
+        Order.objects.filter(pk=order.pk).update(total_amount=total)
+
+    resp = auth_client.get(URL, {"ordering": "total_amount"})
+    assert [o["total_amount"] for o in resp.data["results"]] == ["10.00", "20.00", "30.00"]
+
+    resp = auth_client.get(URL, {"ordering": "created_at"})
+    assert [o["status"] for o in resp.data["results"]] == ["PAID", "SHIPPED", "PENDING"]
+
+    # campo fora de ordering_fields é ignorado (ordem padrão: mais recentes primeiro)
+    resp = auth_client.get(URL, {"ordering": "shipping_address"})
+    assert [o["status"] for o in resp.data["results"]] == ["PENDING", "SHIPPED", "PAID"]
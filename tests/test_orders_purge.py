@@ -0,0 +1,42 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+
+
+def _cart(username, product, age_days):
+    user = User.objects.create_user(username=username, password="x")
+    cart = Order.objects.create(user=user, status=Order.Status.CART)
+    OrderItem.objects.create(order=cart, product=product, quantity=1, unit_price=product.price)
+    Order.objects.filter(pk=cart.pk).update(updated_at=timezone.now() - timedelta(days=age_days))
+    return cart
+
+
+@pytest.mark.django_db
+def test_purge_abandoned_carts_in_batches(product):
+    old = [_cart(f"old{i}", product, 45) for i in range(5)]
+    fresh = _cart("fresh", product, 1)
+    pending = _cart("pending", product, 90)
+    Order.objects.filter(pk=pending.pk).update(status=Order.Status.PENDING)
+
+    out = StringIO()
+    call_command("purge_abandoned_carts", "--days", "30", "--batch-size", "2", stdout=out)
+
+    assert not Order.objects.filter(pk__in=[c.pk for c in old]).exists()
+    assert Order.objects.filter(pk__in=[fresh.pk, pending.pk]).count() == 2
+    assert OrderItem.objects.count() == 2
+    assert "5 carrinho(s) e 5 item(ns) removidos em 3 lote(s)" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_purge_abandoned_carts_dry_run(product):
+    _cart("old", product, 45)
+    out = StringIO()
+    call_command("purge_abandoned_carts", "--dry-run", stdout=out)
+    assert Order.objects.count() == 1
+    assert "1 carrinho(s) e 1 item(ns) seriam removidos" in out.getvalue()
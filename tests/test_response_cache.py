@@ -0,0 +1,156 @@
+import gzip
+import json
+import time
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from app import response_cache
+from app.response_cache import choose_encoding
+from catalog.models import Product
+
+URL = "/api/catalog/products/"
+
+
+@pytest.fixture
+def many_products(category):
+    return Product.objects.bulk_create([
+        Product(sku=f"G{i}", slug=f"g{i}", name=f"Produto comprimível {i}", price="10.00", stock=1, category=category)
+        for i in range(10)
+    ])
+
+
+def test_choose_encoding():
+    available = {"identity": b"", "gzip": b"", "br": b""}
+    assert choose_encoding("gzip, deflate, br", available) == "br"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5", available) == "gzip"
+    assert choose_encoding("br;q=0, gzip", available) == "gzip"
+    assert choose_encoding("", available) == "identity"
+    assert choose_encoding("*", {"identity": b"", "gzip": b""}) == "gzip"
+
+
+@pytest.mark.django_db
+def test_list_is_served_precompressed_from_cache(api_client, many_products):
+    first = api_client.get(URL, HTTP_ACCEPT_ENCODING="gzip")
+    assert first.status_code == 200
+    assert first["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in first["Vary"]
+    body = json.loads(gzip.decompress(first.content))
+    assert body["count"] == 10
+
+    with CaptureQueriesContext(connection) as ctx:
+        hit = api_client.get(URL, HTTP_ACCEPT_ENCODING="gzip")
+    assert ctx.captured_queries == []
+    assert hit.content == first.content
+    assert hit["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in hit["Vary"]
+
+    # cliente sem compressão recebe a variante identity da mesma entrada
+    with CaptureQueriesContext(connection) as ctx:
+        plain = api_client.get(URL)
+    assert ctx.captured_queries == []
+    assert not plain.has_header("Content-Encoding")
+    assert json.loads(plain.content) == body
+
+
+@pytest.mark.django_db
+def test_head_shares_the_get_cache_entry(api_client, many_products):
+    head = api_client.head(URL)
+    assert head.status_code == 200
+
+    with CaptureQueriesContext(connection) as ctx:
+        get = api_client.get(URL)
+        again = api_client.head(URL, HTTP_ACCEPT_ENCODING="gzip")
+    assert ctx.captured_queries == []
+    assert len(get.json()["results"]) == 10
+    assert again["Content-Encoding"] == "gzip"
+
+
+def test_compression_levels_follow_settings(settings, monkeypatch):
+    calls = []
+    monkeypatch.setattr(response_cache.gzip, "compress", lambda body, compresslevel, mtime: calls.append(compresslevel) or b"")
+    settings.RESPONSE_CACHE_GZIP_LEVEL = 4
+    response_cache.compress_variants(b"x" * 1024)
+    assert calls == [4]
+
+
+def _lock_key(path):
+    request = RequestFactory().get(path)
+    return f"{response_cache._cache_key('catalog-products', request)}:lock"
+
+
+@pytest.mark.django_db
+def test_stale_entry_is_served_while_another_request_recomputes(api_client, product):
+    first = api_client.get(URL)
+    assert first.json()["results"][0]["name"] == "Headset"
+
+    product.name = "Headset Pro"
+    product.save()
+    response_cache.invalidate("catalog-products")
+
+    # outra requisição segura o lock: esta recebe a versão anterior sem ir ao banco
+    cache.add(_lock_key(URL), 1)
+    with CaptureQueriesContext(connection) as ctx:
+        stale = api_client.get(URL)
+    assert ctx.captured_queries == []
+    assert stale.json()["results"][0]["name"] == "Headset"
+
+    # lock liberado: a próxima requisição recalcula e libera o lock ao terminar
+    cache.delete(_lock_key(URL))
+    fresh = api_client.get(URL)
+    assert fresh.json()["results"][0]["name"] == "Headset Pro"
+    assert cache.get(_lock_key(URL)) is None
+
+
+@pytest.mark.django_db
+def test_product_change_invalidates_list_after_commit(api_client, product, django_capture_on_commit_callbacks):
+    api_client.get(URL)
+    generation = response_cache.current_generation("catalog-products")
+    with django_capture_on_commit_callbacks(execute=True):
+        product.name = "Outro"
+        product.save()
+    assert response_cache.current_generation("catalog-products") == generation + 1
+    assert api_client.get(URL).json()["results"][0]["name"] == "Outro"
+
+
+@pytest.mark.django_db
+def test_warm_catalog_cache_recomputes_top_requests(api_client, product, category):
+    # descarta contagens pendentes de outros testes
+    response_cache.flush_hits("catalog-products")
+    cache.clear()
+    for _ in range(3):
+        api_client.get(URL, {"ordering": "price"})
+    api_client.get(URL, {"category": category.id})
+    response_cache.flush_hits("catalog-products")
+    assert response_cache.top_requests("catalog-products", 1)[0].split("|")[2] == f"{URL}?ordering=price"
+
+    response_cache.invalidate("catalog-products")
+    out = StringIO()
+    call_command("warm_catalog_cache", "--limit", "2", stdout=out)
+    assert "2/2 listagem(ns) aquecida(s)" in out.getvalue()
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(URL, {"ordering": "price"})
+    assert resp.status_code == 200
+    assert ctx.captured_queries == []
+
+
+@pytest.mark.django_db
+def test_warm_is_not_throttled(api_client, product):
+    response_cache.flush_hits("catalog-products")
+    cache.clear()
+    api_client.get(URL)
+    response_cache.flush_hits("catalog-products")
+
+    # cota "anon" de 127.0.0.1 esgotada: clientes recebem 429, o warm-up não
+    cache.set("throttle_anon_127.0.0.1", [time.time()] * 60)
+    assert api_client.get(URL, {"page": 2}).status_code == 429
+    response_cache.invalidate("catalog-products")
+    [(path, status, _)] = response_cache.warm("catalog-products", 5)
+    assert (path, status) == (URL, 200)
+    assert len(cache.get("throttle_anon_127.0.0.1")) == 60
@@ -0,0 +1,66 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+BASE = "/api"
+
+
+@pytest.mark.django_db
+def test_product_fields_narrow_output_and_sql(api_client, product):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(f"{BASE}/catalog/products/?fields=id,name,price")
+    assert resp.status_code == 200
+    assert resp.data["results"][0] == {"id": product.id, "name": "Headset", "price": "199.90"}
+
+    select = next(q["sql"] for q in ctx.captured_queries if "LIMIT" in q["sql"])
+    assert "JOIN" not in select
+    assert '"description"' not in select
+    assert '"stock"' not in select
+
+
+@pytest.mark.django_db
+def test_default_read_selects_only_serializer_columns(api_client, product):
+    for url in (f"{BASE}/catalog/products/", f"{BASE}/catalog/products/{product.id}/"):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = api_client.get(url)
+        assert resp.status_code == 200
+        sql = next(q["sql"] for q in ctx.captured_queries if '"catalog_product"."sku"' in q["sql"])
+        select = sql.split(" FROM ")[0]  # o ORDER BY ainda usa created_at
+        for column in ('"description"', '"slug"', '"created_at"', '"updated_at"', '"catalog_category"."parent_id"'):
+            assert column not in select
+        assert '"catalog_category"."name"' in select
+
+
+@pytest.mark.django_db
+def test_product_category_name_keeps_join(api_client, product):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(f"{BASE}/catalog/products/?exclude=stock,is_active")
+    assert resp.status_code == 200
+    assert set(resp.data["results"][0]) == {"id", "sku", "name", "price", "category", "category_name"}
+    assert resp.data["results"][0]["category_name"] == "Eletrônicos"
+    assert len(ctx.captured_queries) == 2  # COUNT + página (categoria via JOIN)
+
+
+@pytest.mark.django_db
+def test_invalid_fields_are_rejected_without_queries(api_client, product):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(f"{BASE}/catalog/products/?fields=id,description")
+    assert resp.status_code == 400
+    assert "description" in resp.data["fields"]
+    assert ctx.captured_queries == []
+
+
+@pytest.mark.django_db
+def test_category_and_order_fields(api_client, auth_client, product):
+    resp = api_client.get(f"{BASE}/catalog/categories/?fields=name")
+    assert resp.data["results"] == [{"name": "Eletrônicos"}]
+
+    auth_client.post(f"{BASE}/orders/me/cart/add-item", {"product_id": product.id, "quantity": 1}, format="json")
+    resp = auth_client.get(f"{BASE}/orders?exclude=item_count,total_quantity")
+    assert resp.status_code == 200
+    assert set(resp.data["results"][0]) == {"id", "status", "total_amount", "created_at", "updated_at"}
+
+    order_id = resp.data["results"][0]["id"]
+    resp = auth_client.get(f"{BASE}/orders/{order_id}?fields=id,items")
+    assert resp.status_code == 200
+    assert resp.data["items"][0]["sku"] == "SKU-1"
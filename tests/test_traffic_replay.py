@@ -0,0 +1,94 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from app.traffic import body_shape, percentile, synthesize_body
+
+
+def test_body_shape_roundtrip():
+    shape = body_shape({"product_id": 3, "quantity": 2, "tags": ["a"], "note": None})
+    assert shape == {"product_id": "int", "quantity": "int", "tags": ["str"], "note": "null"}
+    assert synthesize_body(shape) == {"product_id": 1, "quantity": 1, "tags": ["x"], "note": None}
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 100) == 100
+    assert percentile([], 50) is None
+
+
+@pytest.mark.django_db
+def test_middleware_records_sampled_requests(settings, tmp_path, auth_client, product):
+    path = tmp_path / "traffic.jsonl"
+    settings.TRAFFIC_RECORD_RATE = 1.0
+    settings.TRAFFIC_RECORD_PATH = str(path)
+
+    # clientes novos carregam o middleware já com as configurações acima
+    APIClient().get("/api/catalog/products/", {"search": "head"})
+    client = APIClient()
+    client.credentials(**auth_client._credentials)
+    client.post("/api/orders/me/cart/add-item", {"product_id": product.id, "quantity": 2}, format="json")
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert lines[0]["route"] == "product-list"
+    assert lines[0]["query"] == {"search": ["head"]}
+    assert lines[0]["role"] == "anon"
+    assert lines[1]["method"] == "POST"
+    assert lines[1]["role"] == "user"
+    assert lines[1]["body_shape"] == {"product_id": "int", "quantity": "int"}
+
+
+@pytest.mark.django_db
+def test_middleware_ignores_malformed_content_length(settings, tmp_path, product):
+    path = tmp_path / "traffic.jsonl"
+    settings.TRAFFIC_RECORD_RATE = 1.0
+    settings.TRAFFIC_RECORD_PATH = str(path)
+
+    resp = APIClient().generic("GET", "/api/catalog/products/", content_type="application/json", CONTENT_LENGTH="abc")
+    assert resp.status_code == 200
+    [line] = path.read_text().splitlines()
+    assert json.loads(line)["body_shape"] is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_replay_traffic_in_process(tmp_path, product, user):
+    path = tmp_path / "traffic.jsonl"
+    records = [
+        {"ts": 1.0, "method": "GET", "route": "product-list", "path": "/api/catalog/products/", "query": {}, "role": "anon"},
+        {"ts": 1.1, "method": "GET", "route": "product-detail", "path": f"/api/catalog/products/{product.id}/", "query": {}, "role": "anon"},
+        {"ts": 1.2, "method": "GET", "route": "order-list", "path": "/api/orders", "query": {}, "role": "user"},
+        {"ts": 1.3, "method": "GET", "route": "order-list", "path": "/api/orders", "query": {}, "role": "staff"},
+        {"ts": 1.4, "method": "POST", "route": "order-add-item", "path": "/api/orders/me/cart/add-item", "query": {},
+         "body_shape": {"product_id": "int"}, "role": "user"},
+    ]
+    path.write_text("\n".join(json.dumps(r) for r in records))
+
+    out = StringIO()
+    call_command("replay_traffic", str(path), "--as-user", "user", "--concurrency", "2", stdout=out)
+    output = out.getvalue()
+    assert "GET product-list" in output
+    assert "100.0%" not in output  # nenhuma rota com erro
+    assert "GET order-list" in output
+    assert "POST" not in output  # escritas só com --include-writes
+    assert "3 requisição(ões)" in output
+    assert "1 ignorada(s)" in output  # papel staff sem --as-staff
+
+
+@pytest.mark.django_db(transaction=True)
+def test_replay_in_process_is_not_throttled(tmp_path, product):
+    # mais requisições anônimas do que o limite "anon" (60/min), todas de 127.0.0.1
+    path = tmp_path / "traffic.jsonl"
+    record = {"method": "GET", "route": "product-detail", "path": f"/api/catalog/products/{product.id}/", "query": {}, "role": "anon"}
+    path.write_text("\n".join(json.dumps({**record, "ts": i / 10}) for i in range(80)))
+
+    out = StringIO()
+    call_command("replay_traffic", str(path), "--concurrency", "1", stdout=out)
+    row = next(line for line in out.getvalue().splitlines() if line.startswith("GET product-detail"))
+    count, *_, errors, client_errors = row.split()[2:]
+    assert count == "80"
+    assert (errors, client_errors) == ("0.0%", "0.0%")